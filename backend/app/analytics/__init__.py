@@ -1,9 +1,60 @@
-"""Analytics package"""
-from .basic_stats import BasicStatsAnalyzer
-from .temporal import TemporalAnalyzer
-from .personality import PersonalityAnalyzer
-from .emoji_analysis import EmojiAnalyzer
-from .media_analysis import MediaAnalyzer
-from .code_detection import CodeDetector
-from .sentiment import SentimentAnalyzer
-from .topics import TopicModeler
+"""Analytics package
+
+Analyzers are imported on first access (PEP 562), and the modules defer
+their heavy dependencies (scikit-learn, vaderSentiment, emoji) to first
+use, so importing the package stays cheap.
+"""
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# Public name -> module defining it
+_EXPORTS = {
+    'BasicStatsAnalyzer': '.basic_stats',
+    'TemporalAnalyzer': '.temporal',
+    'PersonalityAnalyzer': '.personality',
+    'EmojiAnalyzer': '.emoji_analysis',
+    'MediaAnalyzer': '.media_analysis',
+    'CodeDetector': '.code_detection',
+    'SentimentAnalyzer': '.sentiment',
+    'TopicModeler': '.topics',
+    'AnalysisScheduler': '.scheduler',
+    'add_message_features': '.features',
+    'build_sender_table': '.senders',
+}
+
+__all__ = list(_EXPORTS) + ['import_analyzers']
+
+if TYPE_CHECKING:
+    from .basic_stats import BasicStatsAnalyzer
+    from .temporal import TemporalAnalyzer
+    from .personality import PersonalityAnalyzer
+    from .emoji_analysis import EmojiAnalyzer
+    from .media_analysis import MediaAnalyzer
+    from .code_detection import CodeDetector
+    from .sentiment import SentimentAnalyzer
+    from .topics import TopicModeler
+    from .scheduler import AnalysisScheduler
+    from .features import add_message_features
+    from .senders import build_sender_table
+
+
+def __getattr__(name: str) -> Any:
+    """Import an analyzer's module the first time the analyzer is accessed."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+def import_analyzers() -> None:
+    """
+    Import every analyzer module now, which also registers their shared
+    resources, e.g. to warm up before taking traffic.
+    """
+    for name in _EXPORTS:
+        __getattr__(name)
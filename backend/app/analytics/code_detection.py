@@ -5,8 +5,9 @@ Detects and analyzes code snippets for Slide 7
 import pandas as pd
 import regex as re
 from collections import Counter
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 from ..models.schemas import Slide7Data, CoderStats
+from ..resources import resources
 
 
 class CodeDetector:
@@ -80,6 +81,7 @@ class CodeDetector:
     
     def __init__(self, df: pd.DataFrame):
         self.df = df
+        self.patterns = resources.get('code_patterns')
         
     def analyze(self) -> Slide7Data:
         """
@@ -166,22 +168,22 @@ class CodeDetector:
         code_score = 0
         
         # Check language-specific patterns
-        for lang, patterns in self.LANGUAGE_PATTERNS.items():
+        for lang, patterns in self.patterns['languages'].items():
             for pattern in patterns:
-                if re.search(pattern, message, re.IGNORECASE):
+                if pattern.search(message):
                     detected_languages.append(lang)
                     code_score += 2
                     break
         
         # Check generic code indicators
-        for pattern in self.CODE_INDICATORS:
-            if re.search(pattern, message):
+        for pattern in self.patterns['indicators']:
+            if pattern.search(message):
                 code_score += 1
         
         # Check programming keywords
         message_lower = message.lower()
-        for keyword in self.PROGRAMMING_KEYWORDS:
-            if re.search(rf'\b{keyword}\b', message_lower):
+        for keyword, pattern in self.patterns['keywords']:
+            if pattern.search(message_lower):
                 found_keywords.append(keyword)
                 code_score += 0.5
         
@@ -204,3 +206,22 @@ class CodeDetector:
         geek_energy = min(code_ratio * 1000, 100)
         
         return geek_energy
+
+
+@resources.register('code_patterns')
+def _build_code_patterns() -> Dict[str, Any]:
+    """
+    CodeDetector's patterns, compiled: 'languages' maps each language to its
+    patterns, 'indicators' lists the generic ones and 'keywords' pairs each
+    programming keyword with its whole-word pattern.
+    """
+    return {
+        'languages': {
+            lang: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+            for lang, patterns in CodeDetector.LANGUAGE_PATTERNS.items()
+        },
+        'indicators': [re.compile(pattern) for pattern in CodeDetector.CODE_INDICATORS],
+        'keywords': [
+            (keyword, re.compile(rf'\b{keyword}\b')) for keyword in CodeDetector.PROGRAMMING_KEYWORDS
+        ],
+    }
@@ -3,10 +3,10 @@ Emoji Analyzer
 Analyzes emoji and sticker usage for Slide 5
 """
 import pandas as pd
-import emoji
 from collections import Counter
 from typing import Dict, List
 from ..models.schemas import Slide5Data, EmojiStat
+from .features import with_message_features
 
 
 class EmojiAnalyzer:
@@ -32,21 +32,12 @@ class EmojiAnalyzer:
         Returns:
             Slide5Data with top emojis, sticker count, mood breakdown
         """
-        # Extract all emojis
-        all_emojis = []
-        emoji_by_sender = {}
+        # Emojis of every message, from the shared feature stage
+        df = with_message_features(self.df)
+        all_emojis = ''.join(df['emojis'])
         
-        for _, row in self.df.iterrows():
-            message = str(row['message'])
-            sender = row['sender']
-            
-            # Extract emojis from message
-            message_emojis = [c for c in message if c in emoji.EMOJI_DATA]
-            all_emojis.extend(message_emojis)
-            
-            if sender not in emoji_by_sender:
-                emoji_by_sender[sender] = []
-            emoji_by_sender[sender].extend(message_emojis)
+        # Each sender's emojis, senders in order of first message
+        emoji_by_sender = df.groupby('sender', observed=True, sort=False)['emojis'].agg(''.join).to_dict()
         
         # Count emojis
         emoji_counts = Counter(all_emojis)
@@ -106,7 +97,7 @@ class EmojiAnalyzer:
     
     def _find_top_emoji_users(
         self, 
-        emoji_by_sender: Dict[str, List[str]], 
+        emoji_by_sender: Dict[str, str], 
         emoji_counts: Counter
     ) -> Dict[str, str]:
         """Find who uses each top emoji the most."""
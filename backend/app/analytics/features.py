@@ -0,0 +1,105 @@
+"""
+Message Features
+Per-message columns derived once after parsing and shared by the analyzers
+"""
+import re
+import sys
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable
+from ..resources import resources
+
+URL_PATTERN = r'https?://\S+|www\.\S+'
+
+# Columns added by add_message_features
+FEATURE_COLUMNS = [
+    'text_lower', 'emojis', 'emoji_count', 'is_question',
+    'caps_count', 'caps_ratio', 'char_length', 'url_count'
+]
+
+
+def add_message_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the shared per-message feature columns to a parsed chat.
+    
+    Each column is one vectorized string operation over all messages:
+    
+    - text_lower: lowercased message (kept if the parser already added it)
+    - emojis: the message's single-character emojis, concatenated in order
+    - emoji_count: number of such emojis
+    - is_question: whether the message contains '?'
+    - caps_count: number of uppercase characters
+    - caps_ratio: caps_count / char_length (0 for empty messages)
+    - char_length: number of characters
+    - url_count: number of http(s) or www links
+    
+    Returns:
+        The frame with the columns added (modified in place)
+    """
+    patterns = resources.get('feature_patterns')
+    messages = df['message'].astype(str)
+    if 'text_lower' not in df.columns:
+        df['text_lower'] = messages.str.lower()
+    df['emojis'] = messages.str.replace(patterns['not_emoji'], '', regex=True)
+    df['emoji_count'] = df['emojis'].str.len().astype(np.int32)
+    df['is_question'] = messages.str.contains('?', regex=False).astype(bool)
+    df['char_length'] = messages.str.len().astype(np.int32)
+    df['caps_count'] = messages.str.count(patterns['uppercase']).astype(np.int32)
+    df['caps_ratio'] = (df['caps_count'] / df['char_length'].where(df['char_length'] > 0)).fillna(0).astype(np.float32)
+    df['url_count'] = messages.str.count(patterns['url']).astype(np.int32)
+    return df
+
+
+def with_message_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Get a frame with the feature columns, computing them on a copy if missing."""
+    if all(column in df.columns for column in FEATURE_COLUMNS):
+        return df
+    return add_message_features(df.copy())
+
+
+@resources.register('feature_patterns')
+def _build_feature_patterns() -> Dict[str, re.Pattern]:
+    """
+    Compiled feature patterns: runs of non-emoji characters, uppercase
+    characters and links. The character tables take ~150ms to build.
+    """
+    return {
+        'not_emoji': re.compile(_not_in_pattern(_emoji_chars())),
+        'uppercase': re.compile(_in_pattern(_uppercase_chars())),
+        'url': re.compile(URL_PATTERN),
+    }
+
+
+def _emoji_chars() -> str:
+    """Single-character emojis, which analyzers count character by character."""
+    import emoji
+    return ''.join(sorted(key for key in emoji.EMOJI_DATA if len(key) == 1))
+
+
+def _uppercase_chars() -> str:
+    """Every character for which ``str.isupper`` is true."""
+    return ''.join(c for c in map(chr, range(sys.maxunicode + 1)) if c.isupper())
+
+
+def _char_class(chars: Iterable[str]) -> str:
+    """Body of a regex character class matching exactly ``chars``, as ranges."""
+    codes = sorted(set(map(ord, chars)))
+    ranges = []
+    start = previous = codes[0]
+    for code in codes[1:] + [None]:
+        if code is not None and code == previous + 1:
+            previous = code
+            continue
+        ranges.append(re.escape(chr(start)) if start == previous
+                      else f'{re.escape(chr(start))}-{re.escape(chr(previous))}')
+        if code is not None:
+            start = previous = code
+    return ''.join(ranges)
+
+
+def _in_pattern(chars: str) -> str:
+    return f'[{_char_class(chars)}]'
+
+
+def _not_in_pattern(chars: str) -> str:
+    return f'[^{_char_class(chars)}]+'
@@ -2,10 +2,11 @@
 Personality Analyzer
 Enhanced rule-based personality classification for Slide 3
 """
+import numpy as np
 import pandas as pd
-import emoji
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from ..models.schemas import Slide3Data, PersonalityProfile
+from .senders import build_sender_table
 
 
 class PersonalityAnalyzer:
@@ -77,24 +78,28 @@ class PersonalityAnalyzer:
         }
     }
     
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
-        # Safely extract hour, handling missing or invalid timestamps
-        if 'hour' not in self.df.columns:
-            if 'timestamp' in self.df.columns:
-                try:
-                    self.df['hour'] = pd.to_datetime(self.df['timestamp'], errors='coerce').dt.hour
-                    self.df['hour'] = self.df['hour'].fillna(12).astype(int)
-                except Exception:
-                    self.df['hour'] = 12
-            elif 'datetime' in self.df.columns:
-                try:
-                    self.df['hour'] = pd.to_datetime(self.df['datetime'], errors='coerce').dt.hour
-                    self.df['hour'] = self.df['hour'].fillna(12).astype(int)
-                except Exception:
-                    self.df['hour'] = 12
-            else:
-                self.df['hour'] = 12
+    # Scored personality types in tie-breaking order: the first highest score wins
+    SCORED_TYPES = [
+        'spammer', 'silent_observer', 'ghost', 'emoji_addict', 'essay_writer',
+        'one_word_warrior', 'night_owl', 'early_bird', 'meme_lord', 'chaos_creator',
+        'voice_note_fan', 'question_asker', 'hype_person', 'reply_speedster'
+    ]
+    
+    # Sender table columns the scores are computed from
+    FEATURES = [
+        'messages', 'text_messages', 'text_words', 'emojis', 'media_messages',
+        'visual_messages', 'audio_messages', 'night_messages', 'morning_messages',
+        'quick_replies', 'questions', 'caps_messages'
+    ]
+    
+    def __init__(self, df: pd.DataFrame, sender_table: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            df: Parsed chat DataFrame
+            sender_table: Result of build_sender_table for ``df``, if already built
+        """
+        self.df = df
+        self.sender_table = sender_table
         
     def analyze(self) -> Slide3Data:
         """
@@ -105,20 +110,33 @@ class PersonalityAnalyzer:
         """
         personalities = []
         
+        # One row of totals per sender, in order of their first message
+        sender_table = self.sender_table if self.sender_table is not None else build_sender_table(self.df)
+        sender_table = sender_table.sort_values('first_seen')
+        
         # Calculate group-level metrics for comparison
-        num_senders = self.df['sender'].nunique()
-        avg_messages = len(self.df) / max(num_senders, 1)
+        avg_messages = len(self.df) / max(len(sender_table), 1)
         
-        text_df = self.df[self.df['message_type'] == 'text']
-        if len(text_df) > 0 and 'word_count' in text_df.columns:
-            avg_word_count = text_df['word_count'].mean()
-        else:
-            avg_word_count = 0
+        # Score every type for every sender at once and keep each sender's best
+        scores = self._score_personalities(self._feature_matrix(sender_table), avg_messages)
+        best_types = scores.argmax(axis=1)
+        best_scores = np.take_along_axis(scores, best_types[:, None], axis=1)[:, 0]
         
-        for sender in self.df['sender'].unique():
-            sender_df = self.df[self.df['sender'] == sender]
-            profile = self._classify_personality(sender_df, avg_messages, avg_word_count)
-            personalities.append(profile)
+        for sender, type_index, score in zip(sender_table.index, best_types, best_scores):
+            if score < 40:  # Increased threshold for balanced
+                personality_type = 'balanced_chatter'
+                score = 55.0
+            else:
+                personality_type = self.SCORED_TYPES[type_index]
+            
+            type_info = self.PERSONALITY_TYPES[personality_type]
+            personalities.append(PersonalityProfile(
+                name=sender,
+                personality_type=personality_type.replace('_', ' ').title(),
+                personality_emoji=type_info['emoji'],
+                traits=type_info['traits'],
+                score=round(min(score, 99.0), 1)  # Cap at 99 for realism
+            ))
         
         # Sort by score descending
         personalities.sort(key=lambda x: x.score, reverse=True)
@@ -138,141 +156,99 @@ class PersonalityAnalyzer:
             methodology=methodology
         )
     
-    def _classify_personality(
-        self, 
-        sender_df: pd.DataFrame, 
-        avg_messages: float,
-        avg_word_count: float
-    ) -> PersonalityProfile:
-        """Classify personality for a single sender with improved distribution."""
-        sender = sender_df['sender'].iloc[0]
-        message_count = len(sender_df)
-        
-        # Calculate metrics
-        text_messages = sender_df[sender_df['message_type'] == 'text']
-        avg_length = text_messages['word_count'].mean() if len(text_messages) > 0 else 0
-        
-        # Emoji ratio
-        emoji_count = sum(
-            len([c for c in msg if c in emoji.EMOJI_DATA])
-            for msg in sender_df['message'].astype(str)
-        )
-        emoji_ratio = emoji_count / max(message_count, 1)
+    def _feature_matrix(self, sender_table: pd.DataFrame) -> np.ndarray:
+        """Get the senders x FEATURES matrix (types nobody sent count as 0)."""
+        return sender_table.reindex(columns=self.FEATURES, fill_value=0).to_numpy(dtype=np.float64)
+    
+    def _score_personalities(self, features: np.ndarray, avg_messages: float) -> np.ndarray:
+        """
+        Score every personality type for every sender.
         
-        # Media ratio
-        media_types = ['image', 'video', 'sticker', 'gif', 'document']
-        media_count = len(sender_df[sender_df['message_type'].isin(media_types)])
-        media_ratio = media_count / max(message_count, 1)
+        Args:
+            features: Senders x FEATURES matrix
+            avg_messages: Average message count per sender
+            
+        Returns:
+            Senders x SCORED_TYPES matrix of scores
+        """
+        (
+            message_count, text_count, text_words, emojis, media, visual,
+            audio, night, morning, quick_replies, questions, caps
+        ) = features.T
+        per_message = np.maximum(message_count, 1)
+        per_text = np.maximum(text_count, 1)
         
-        # Audio ratio
-        audio_count = len(sender_df[sender_df['message_type'] == 'audio'])
-        audio_ratio = audio_count / max(message_count, 1)
+        # Calculate metrics
+        avg_length = np.where(text_count > 0, text_words / per_text, 0)
+        emoji_ratio = emojis / per_message
+        media_ratio = media / per_message
+        visual_ratio = visual / per_message
+        audio_ratio = audio / per_message
         
         # Frequency ratio (compared to average)
         freq_ratio = message_count / max(avg_messages, 1)
         
         # Time-based analysis
-        hour_counts = sender_df['hour'].value_counts()
-        night_messages = sender_df[sender_df['hour'].isin([22, 23, 0, 1, 2, 3])]['hour'].count()
-        morning_messages = sender_df[sender_df['hour'].isin([5, 6, 7, 8, 9])]['hour'].count()
-        night_ratio = night_messages / max(message_count, 1)
-        morning_ratio = morning_messages / max(message_count, 1)
+        night_ratio = night / per_message
+        morning_ratio = morning / per_message
         
         # Response time analysis (simple: messages within 5 minutes of previous message)
-        quick_ratio = 0
-        if 'timestamp' in sender_df.columns or 'datetime' in sender_df.columns:
-            time_col = 'timestamp' if 'timestamp' in sender_df.columns else 'datetime'
-            try:
-                sender_df_sorted = sender_df.sort_values(time_col).copy()
-                sender_df_sorted['time_diff'] = pd.to_datetime(sender_df_sorted[time_col], errors='coerce').diff().dt.total_seconds() / 60
-                quick_responses = len(sender_df_sorted[sender_df_sorted['time_diff'] < 5])
-                quick_ratio = quick_responses / max(message_count - 1, 1)
-            except Exception:
-                quick_ratio = 0
-        
-        # Question analysis
-        question_count = sum(
-            '?' in str(msg) 
-            for msg in text_messages['message']
-        )
-        question_ratio = question_count / max(len(text_messages), 1)
+        quick_ratio = quick_replies / np.maximum(message_count - 1, 1)
         
-        # Caps analysis (enthusiasm)
-        caps_count = sum(
-            sum(1 for c in str(msg) if c.isupper()) > len(str(msg)) * 0.3 
-            for msg in text_messages['message']
-        )
-        caps_ratio = caps_count / max(len(text_messages), 1)
+        # Question and caps (enthusiasm) share of text messages
+        question_ratio = questions / per_text
+        caps_ratio = caps / per_text
         
         # Score each personality type with improved thresholds
         scores = {}
         
         # Spammer: >2.5x average frequency (increased threshold)
-        scores['spammer'] = min(freq_ratio / 3, 1.0) * 100 if freq_ratio > 2.5 else 0
+        scores['spammer'] = np.where(freq_ratio > 2.5, np.minimum(freq_ratio / 3, 1.0) * 100, 0)
         
         # Silent observer: <0.5x average frequency
-        scores['silent_observer'] = (1 - min(freq_ratio * 2, 1)) * 100 if freq_ratio < 0.5 else 0
+        scores['silent_observer'] = np.where(freq_ratio < 0.5, (1 - np.minimum(freq_ratio * 2, 1)) * 100, 0)
         
         # Ghost: very low frequency with irregular patterns
-        if message_count < avg_messages * 0.3 and len(sender_df) < 20:
-            scores['ghost'] = 70.0
+        scores['ghost'] = np.where((message_count < avg_messages * 0.3) & (message_count < 20), 70.0, 0)
         
         # Emoji addict: >40% emoji usage
-        scores['emoji_addict'] = min(emoji_ratio / 0.6, 1.0) * 100 if emoji_ratio > 0.4 else 0
+        scores['emoji_addict'] = np.where(emoji_ratio > 0.4, np.minimum(emoji_ratio / 0.6, 1.0) * 100, 0)
         
         # Essay writer: avg message length >40 words
-        scores['essay_writer'] = min(avg_length / 60, 1.0) * 100 if avg_length > 40 else 0
+        scores['essay_writer'] = np.where(avg_length > 40, np.minimum(avg_length / 60, 1.0) * 100, 0)
         
         # One word warrior: very short messages
-        scores['one_word_warrior'] = (1 - min(avg_length / 10, 1)) * 100 if avg_length < 5 and avg_length > 0 else 0
+        scores['one_word_warrior'] = np.where(
+            (avg_length < 5) & (avg_length > 0), (1 - np.minimum(avg_length / 10, 1)) * 100, 0
+        )
         
         # Night owl: >30% of messages at night
-        scores['night_owl'] = min(night_ratio / 0.4, 1.0) * 100 if night_ratio > 0.3 else 0
+        scores['night_owl'] = np.where(night_ratio > 0.3, np.minimum(night_ratio / 0.4, 1.0) * 100, 0)
         
         # Early bird: >25% of messages in morning
-        scores['early_bird'] = min(morning_ratio / 0.35, 1.0) * 100 if morning_ratio > 0.25 else 0
+        scores['early_bird'] = np.where(morning_ratio > 0.25, np.minimum(morning_ratio / 0.35, 1.0) * 100, 0)
         
         # Meme lord: high media sharing (not just any media, but stickers/gifs/images)
-        visual_media = len(sender_df[sender_df['message_type'].isin(['image', 'sticker', 'gif'])])
-        visual_ratio = visual_media / max(message_count, 1)
-        scores['meme_lord'] = min(visual_ratio / 0.4, 1.0) * 100 if visual_ratio > 0.25 else 0
+        scores['meme_lord'] = np.where(visual_ratio > 0.25, np.minimum(visual_ratio / 0.4, 1.0) * 100, 0)
         
         # Chaos creator: balanced media + moderate frequency
-        chaos_score = (media_ratio * 0.5 + min(freq_ratio, 2) / 2 * 0.5) * 100
-        scores['chaos_creator'] = chaos_score if media_ratio > 0.2 and media_ratio < 0.6 else 0
+        chaos_score = (media_ratio * 0.5 + np.minimum(freq_ratio, 2) / 2 * 0.5) * 100
+        scores['chaos_creator'] = np.where((media_ratio > 0.2) & (media_ratio < 0.6), chaos_score, 0)
         
         # Voice note fan: >20% audio messages
-        scores['voice_note_fan'] = min(audio_ratio / 0.3, 1.0) * 100 if audio_ratio > 0.2 else 0
+        scores['voice_note_fan'] = np.where(audio_ratio > 0.2, np.minimum(audio_ratio / 0.3, 1.0) * 100, 0)
         
         # Question asker: >30% messages with questions
-        scores['question_asker'] = min(question_ratio / 0.4, 1.0) * 100 if question_ratio > 0.3 else 0
+        scores['question_asker'] = np.where(question_ratio > 0.3, np.minimum(question_ratio / 0.4, 1.0) * 100, 0)
         
         # Hype person: caps usage + high emoji + moderate frequency
-        hype_score = (caps_ratio * 0.4 + min(emoji_ratio / 0.3, 1) * 0.6) * 100
-        scores['hype_person'] = hype_score if caps_ratio > 0.2 or (emoji_ratio > 0.3 and freq_ratio > 0.8) else 0
+        hype_score = (caps_ratio * 0.4 + np.minimum(emoji_ratio / 0.3, 1) * 0.6) * 100
+        scores['hype_person'] = np.where((caps_ratio > 0.2) | ((emoji_ratio > 0.3) & (freq_ratio > 0.8)), hype_score, 0)
         
         # Reply speedster: >60% quick responses
-        scores['reply_speedster'] = min(quick_ratio / 0.7, 1.0) * 100 if quick_ratio > 0.6 else 0
-        
-        # Find dominant personality with minimum threshold
-        max_score = max(scores.values()) if scores else 0
-        
-        if max_score < 40:  # Increased threshold for balanced
-            personality_type = 'balanced_chatter'
-            score = 55.0
-        else:
-            personality_type = max(scores, key=scores.get)
-            score = scores[personality_type]
-        
-        type_info = self.PERSONALITY_TYPES[personality_type]
-        
-        return PersonalityProfile(
-            name=sender,
-            personality_type=personality_type.replace('_', ' ').title(),
-            personality_emoji=type_info['emoji'],
-            traits=type_info['traits'],
-            score=round(min(score, 99.0), 1)  # Cap at 99 for realism
-        )
+        scores['reply_speedster'] = np.where(quick_ratio > 0.6, np.minimum(quick_ratio / 0.7, 1.0) * 100, 0)
+        
+        return np.column_stack([scores[name] for name in self.SCORED_TYPES])
     
     def _determine_group_personality(self, personalities: List[PersonalityProfile]) -> str:
         """Determine the overall group personality."""
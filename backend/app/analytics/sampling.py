@@ -0,0 +1,57 @@
+"""
+Sampling Helpers
+Seeded stratified samples and confidence intervals for approximate mode
+"""
+import math
+import numpy as np
+import pandas as pd
+from typing import Tuple, Union
+
+
+def stratified_sample(
+    df: pd.DataFrame,
+    by: str,
+    per_group: Union[int, pd.Series],
+    seed: int = 42
+) -> pd.DataFrame:
+    """
+    Sample rows without replacement within each group, keeping their order.
+    
+    The same frame and seed always give the same sample.
+    
+    Args:
+        df: Rows to sample from
+        by: Column whose values define the groups
+        per_group: Rows to keep per group, as one number or a Series indexed
+                   by group value; groups with fewer rows are kept whole
+        seed: Seed of the random generator
+    """
+    keys = pd.Series(np.random.default_rng(seed).random(len(df)), index=df.index)
+    ranks = keys.groupby(df[by], observed=True).rank(method='first')
+    if isinstance(per_group, pd.Series):
+        per_group = df[by].map(per_group).astype(float)
+    return df[ranks <= per_group]
+
+
+def proportional_allocation(counts: pd.Series, total: int) -> pd.Series:
+    """Split a sample size across groups in proportion to their sizes, at least one each."""
+    return np.ceil(counts * total / counts.sum()).clip(lower=1).astype(int)
+
+
+def mean_confidence_interval(
+    values: pd.Series,
+    population: int,
+    z: float = 1.96
+) -> Tuple[float, float]:
+    """
+    Normal-approximation confidence interval (95% by default) for the mean of
+    a population estimated from a simple random sample of it.
+    """
+    n = len(values)
+    mean = float(values.mean())
+    if n < 2 or n >= population:
+        return mean, mean
+    # Finite population correction: the interval shrinks as the sample nears the population
+    fpc = math.sqrt((population - n) / (population - 1))
+    margin = z * float(values.std()) / math.sqrt(n) * fpc
+    return mean - margin, mean + margin
@@ -0,0 +1,182 @@
+"""
+Analysis Scheduler
+Runs independent analysis steps concurrently on a worker pool
+"""
+import time
+import logging
+import pandas as pd
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..memory import traced_memory
+from ..profiling import RawStats, profiled_call
+from ..resources import resources
+
+logger = logging.getLogger(__name__)
+
+
+def _run_analyzer(analyzer_cls: type, df: pd.DataFrame, *results: Any, **options: Any) -> Any:
+    """Instantiate an analyzer on the frame (and dependency results) and run it."""
+    return analyzer_cls(df, *results, **options).analyze()
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    """Call ``func`` and return its result with its wall time in seconds."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _memory_tracked_call(call: Callable[..., Tuple[Any, ...]], func: Callable[..., Any], *args: Any) -> Tuple[Any, ...]:
+    """Make ``call(func, *args)`` and append the (peak, net) bytes it allocated to its outcome."""
+    with traced_memory() as usage:
+        outcome = call(func, *args)
+    return (*outcome, tuple(usage))
+
+
+class AnalysisScheduler:
+    """
+    Scheduler for the analysis steps of one upload.
+    
+    Each step is called with the chat DataFrame followed by the results of
+    the steps it depends on. Steps start as soon as their dependencies have
+    finished, so independent ones run side by side and the total latency
+    approaches that of the slowest chain rather than the sum of all steps.
+    
+    With ``profile``, each step also runs under cProfile and its raw pstats
+    data is kept in ``profiles``; with ``track_memory`` the peak and net
+    bytes each step allocates are kept in ``memory``. Both are only
+    meaningful for steps that run one at a time.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int = 4,
+        use_processes: bool = False,
+        profile: bool = False,
+        track_memory: bool = False
+    ):
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.profile = profile
+        self.track_memory = track_memory
+        self.steps: Dict[str, Tuple[Callable[..., Any], List[str]]] = {}
+        self.timings: Dict[str, float] = {}  # wall time of each step in seconds
+        self.profiles: Dict[str, RawStats] = {}  # pstats data of each step, when profiling
+        self.memory: Dict[str, Tuple[int, int]] = {}  # (peak, net) bytes of each step, when tracking
+    
+    def add(self, name: str, func: Callable[..., Any], depends_on: List[str] = ()) -> None:
+        """
+        Register a step.
+        
+        Args:
+            name: Key of the step's result
+            func: Called as ``func(df, *results_of_depends_on)``; must be
+                  picklable when running on processes
+            depends_on: Names of previously added steps whose results it takes
+        """
+        missing = [dependency for dependency in depends_on if dependency not in self.steps]
+        if missing:
+            raise ValueError(f"Step {name!r} depends on unknown steps: {', '.join(missing)}")
+        self.steps[name] = (func, list(depends_on))
+    
+    def add_analyzer(self, name: str, analyzer_cls: type, depends_on: List[str] = (), **options: Any) -> None:
+        """
+        Register an analyzer class, whose ``analyze()`` result becomes the step
+        result. Its constructor is called with the frame, the results of
+        ``depends_on`` and ``options``.
+        """
+        self.add(name, partial(_run_analyzer, analyzer_cls, **options), depends_on)
+    
+    def required_steps(self, names: Iterable[str]) -> List[str]:
+        """
+        Get the given steps and everything they depend on, in the order they
+        were added.
+        """
+        required = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.steps:
+                raise ValueError(f"Unknown step {name!r}")
+            if name not in required:
+                required.add(name)
+                stack.extend(self.steps[name][1])
+        return [name for name in self.steps if name in required]
+    
+    def run(
+        self,
+        df: pd.DataFrame,
+        on_step_done: Optional[Callable[[str, Any], None]] = None,
+        only: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the steps and return their results by name.
+        
+        The first step to fail cancels the ones that have not started and its
+        exception is raised.
+        
+        Args:
+            df: Chat DataFrame passed to every step
+            on_step_done: Called with the name and result of each step as it
+                          finishes
+            only: Steps whose results are wanted; their dependencies run
+                  too but are left out of the results. Defaults to all steps.
+        """
+        self.timings = {}
+        self.profiles = {}
+        self.memory = {}
+        call = profiled_call if self.profile else _timed_call
+        if self.track_memory:
+            call = partial(_memory_tracked_call, call)
+        results: Dict[str, Any] = {}
+        if only is None:
+            pending = dict(self.steps)
+        else:
+            only = set(only)
+            pending = {name: self.steps[name] for name in self.required_steps(only)}
+        running: Dict[Future, str] = {}
+        
+        with self._create_executor() as executor:
+            try:
+                while pending or running:
+                    for name, (func, depends_on) in list(pending.items()):
+                        if all(dependency in results for dependency in depends_on):
+                            args = [results[dependency] for dependency in depends_on]
+                            running[executor.submit(call, func, df, *args)] = name
+                            del pending[name]
+                    
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        outcome = list(future.result())
+                        if self.track_memory:
+                            self.memory[name] = outcome.pop()
+                        if self.profile:
+                            self.profiles[name] = outcome.pop()
+                        results[name], self.timings[name] = outcome
+                        if on_step_done:
+                            on_step_done(name, results[name])
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        
+        logger.info("Analysis timings: " + ', '.join(
+            f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.timings.items()
+        ))
+        
+        if only is not None:
+            results = {name: result for name, result in results.items() if name in only}
+        
+        return results
+    
+    def _create_executor(self) -> Executor:
+        """
+        Create the worker pool for one run. Processes are only forked once
+        a running resource warm-up is done, so they cannot inherit its locks.
+        """
+        if self.use_processes:
+            resources.wait_for_warm_up()
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analyzer")
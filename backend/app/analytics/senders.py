@@ -0,0 +1,110 @@
+"""
+Sender Aggregates
+Per-sender totals computed in one groupby pass, shared by Slides 3 and 4
+"""
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+from .features import with_message_features
+
+MEDIA_TYPES = ['image', 'video', 'sticker', 'gif', 'document']
+VISUAL_MEDIA_TYPES = ['image', 'sticker', 'gif']
+NIGHT_HOURS = [22, 23, 0, 1, 2, 3]
+MORNING_HOURS = [5, 6, 7, 8, 9]
+QUICK_REPLY_MINUTES = 5
+
+
+def build_sender_table(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate a parsed chat per sender.
+    
+    Cost is linear in the number of messages whatever the number of senders:
+    every count is a column summed by one groupby.
+    
+    Returns:
+        DataFrame indexed by sender (sorted) with the columns
+        
+        - messages, words: all messages and their word count
+        - text_messages, text_words: the same for text messages
+        - one ``<type>_messages`` column per message type, e.g. image_messages
+        - media_messages, visual_messages: MEDIA_TYPES and VISUAL_MEDIA_TYPES
+        - night_messages, morning_messages: sent in NIGHT_HOURS / MORNING_HOURS
+        - emojis: emojis used
+        - questions, caps_messages: text messages containing '?' and text
+          messages more than 30% uppercase
+        - quick_replies: messages within QUICK_REPLY_MINUTES of the sender's
+          previous one
+        - first_seen: position of the sender's first message
+    """
+    df = with_message_features(df)
+    message_type = df['message_type'].astype(str)
+    is_text = (message_type == 'text').to_numpy()
+    hour = _hours(df)
+    
+    columns = {
+        'messages': np.ones(len(df), dtype=np.int64),
+        'words': df['word_count'].to_numpy(dtype=np.int64),
+        'text_messages': is_text,
+        'text_words': np.where(is_text, df['word_count'].to_numpy(dtype=np.int64), 0),
+        'media_messages': message_type.isin(MEDIA_TYPES).to_numpy(),
+        'visual_messages': message_type.isin(VISUAL_MEDIA_TYPES).to_numpy(),
+        'night_messages': hour.isin(NIGHT_HOURS).to_numpy(),
+        'morning_messages': hour.isin(MORNING_HOURS).to_numpy(),
+        'emojis': df['emoji_count'].to_numpy(dtype=np.int64),
+        'questions': is_text & df['is_question'].to_numpy(),
+        'caps_messages': is_text & (df['caps_count'] > df['char_length'] * 0.3).to_numpy(),
+        'quick_replies': _quick_replies(df),
+    }
+    for name in sorted(message_type.unique()):
+        columns[f'{name}_messages'] = (message_type == name).to_numpy()
+    
+    parts = pd.DataFrame(columns, index=df.index)
+    parts['sender'] = df['sender'].to_numpy()
+    table = parts.groupby('sender', sort=True, observed=True).sum().astype(np.int64)
+    table['first_seen'] = pd.Series(np.arange(len(df)), index=df.index).groupby(
+        df['sender'].to_numpy(), sort=True, observed=True
+    ).min()
+    return table
+
+
+def _time_column(df: pd.DataFrame) -> Optional[str]:
+    """Get the column holding message times, if any."""
+    for column in ('timestamp', 'datetime'):
+        if column in df.columns:
+            return column
+    return None
+
+
+def _hours(df: pd.DataFrame) -> pd.Series:
+    """Get the hour of each message, counting missing or invalid times as noon."""
+    if 'hour' in df.columns:
+        return df['hour']
+    column = _time_column(df)
+    if column is None:
+        return pd.Series(12, index=df.index)
+    return pd.to_datetime(df[column], errors='coerce').dt.hour.fillna(12).astype(int)
+
+
+def _quick_replies(df: pd.DataFrame) -> np.ndarray:
+    """Flag messages sent within QUICK_REPLY_MINUTES of the same sender's previous message."""
+    column = _time_column(df)
+    if column is None:
+        return np.zeros(len(df), dtype=bool)
+    times = pd.to_datetime(df[column], errors='coerce').to_numpy(dtype='datetime64[ns]')
+    senders = pd.factorize(df['sender'])[0]
+    
+    # Order by sender, then time; each message after the first of its sender
+    # is compared with the one before it
+    order = np.lexsort((times.view(np.int64), senders))
+    ordered_times = times[order]
+    gaps = ordered_times[1:] - ordered_times[:-1]
+    quick = (
+        (senders[order][1:] == senders[order][:-1])
+        & ~np.isnat(gaps)
+        & (gaps < np.timedelta64(QUICK_REPLY_MINUTES * 60, 's'))
+    )
+    
+    flags = np.zeros(len(df), dtype=bool)
+    flags[order[1:]] = quick
+    return flags
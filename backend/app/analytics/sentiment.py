@@ -3,9 +3,17 @@ Sentiment Analyzer
 VADER-based sentiment analysis for Slide 8
 """
 import pandas as pd
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import Dict, List
+from typing import Dict, List, Optional
 from ..models.schemas import Slide8Data, MonthlySentiment
+from ..resources import resources
+from .sampling import stratified_sample, mean_confidence_interval
+
+
+@resources.register('vader')
+def _build_vader() -> "SentimentIntensityAnalyzer":
+    """VADER analyzer; loading its lexicon takes ~20ms, so it is shared."""
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
 
 
 class SentimentAnalyzer:
@@ -16,9 +24,18 @@ class SentimentAnalyzer:
         'July', 'August', 'September', 'October', 'November', 'December'
     ]
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, sample_per_month: Optional[int] = None, seed: int = 42):
+        """
+        Args:
+            df: Parsed chat DataFrame
+            sample_per_month: Approximate mode: score at most this many
+                              randomly chosen text messages per month
+            seed: Seed of the sample
+        """
         self.df = df
-        self.analyzer = SentimentIntensityAnalyzer()
+        self.sample_per_month = sample_per_month
+        self.seed = seed
+        self.analyzer = resources.get('vader')
         
     def analyze(self) -> Slide8Data:
         """
@@ -30,6 +47,11 @@ class SentimentAnalyzer:
         # Only analyze text messages
         text_df = self.df[self.df['message_type'] == 'text'].copy()
         
+        # Approximate mode scores a seeded random sample of each month
+        month_counts = text_df['month'].value_counts()
+        if self.sample_per_month:
+            text_df = stratified_sample(text_df, 'month', self.sample_per_month, self.seed)
+        
         # Calculate sentiment for each message
         text_df['sentiment'] = text_df['message'].apply(self._get_sentiment)
         
@@ -42,7 +64,7 @@ class SentimentAnalyzer:
                 continue
             
             avg_sentiment = month_df['sentiment'].mean()
-            message_count = len(month_df)
+            message_count = int(month_counts[month])
             
             # Classify sentiment
             if avg_sentiment >= 0.2:
@@ -52,12 +74,18 @@ class SentimentAnalyzer:
             else:
                 label = "Neutral"
             
-            monthly_data.append(MonthlySentiment(
+            month_sentiment = MonthlySentiment(
                 month=month,
                 score=round(avg_sentiment, 3),
                 label=label,
                 message_count=message_count
-            ))
+            )
+            if self.sample_per_month:
+                low, high = mean_confidence_interval(month_df['sentiment'], message_count)
+                month_sentiment.sample_size = len(month_df)
+                month_sentiment.score_low = round(low, 3)
+                month_sentiment.score_high = round(high, 3)
+            monthly_data.append(month_sentiment)
         
         # Find extremes
         if monthly_data:
@@ -74,8 +102,15 @@ class SentimentAnalyzer:
             happiest_month = "N/A"
             most_intense_month = "N/A"
         
-        # Overall average
-        average_sentiment = text_df['sentiment'].mean() if len(text_df) > 0 else 0.0
+        # Overall average; months are sampled to different degrees, so weigh
+        # each month's sample mean by its full message count
+        if len(text_df) == 0:
+            average_sentiment = 0.0
+        elif self.sample_per_month:
+            month_means = text_df.groupby('month', observed=True)['sentiment'].mean()
+            average_sentiment = (month_means * month_counts[month_means.index]).sum() / month_counts.sum()
+        else:
+            average_sentiment = text_df['sentiment'].mean()
         
         disclaimer = (
             "Sentiment analysis uses VADER, which works best with English text. "
@@ -88,7 +123,8 @@ class SentimentAnalyzer:
             happiest_month=happiest_month,
             most_intense_month=most_intense_month,
             average_sentiment=round(average_sentiment, 3),
-            disclaimer=disclaimer
+            disclaimer=disclaimer,
+            sample_size=len(text_df) if self.sample_per_month else None
         )
     
     def _get_sentiment(self, message: str) -> float:
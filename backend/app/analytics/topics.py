@@ -4,11 +4,42 @@ LDA-based topic modeling optimized for Hinglish group chats
 """
 import pandas as pd
 import regex as re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from collections import Counter
 from ..models.schemas import Slide9Data, Topic
+from ..resources import resources
+from .sampling import stratified_sample, proportional_allocation
+from .features import with_message_features
+
+
+@resources.register('topic_patterns')
+def _build_topic_patterns() -> Dict[str, re.Pattern]:
+    """Compiled patterns used to clean messages before topic modeling."""
+    return {
+        'url': re.compile(r'https?://\S+|www\.\S+'),
+        'mention': re.compile(r'@\S+'),
+        'phone': re.compile(r'\d{10,}'),
+        'emoji': re.compile(r'[😀-🙏🌀-🗿🚀-🛿✂-➰Ⓜ-🉑]+'),
+        'non_alphanumeric': re.compile(r'[^a-z0-9\s]'),
+        'number': re.compile(r'\b\d+\b'),
+    }
+
+
+@resources.register('lda_estimators')
+def _import_lda_estimators() -> Tuple[type, type]:
+    """
+    scikit-learn's TfidfVectorizer and LatentDirichletAllocation; importing
+    scikit-learn takes over a second, so it waits for the first LDA run.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation
+    return TfidfVectorizer, LatentDirichletAllocation
+
+
+@resources.register('topic_stopwords')
+def _build_topic_stopwords() -> List[str]:
+    """TopicModeler.STOPWORDS as the list TfidfVectorizer takes."""
+    return list(TopicModeler.STOPWORDS)
 
 
 class TopicModeler:
@@ -124,8 +155,19 @@ class TopicModeler:
         }
     }
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, sample_size: Optional[int] = None, seed: int = 42):
+        """
+        Args:
+            df: Parsed chat DataFrame
+            sample_size: Approximate mode: model about this many text
+                         messages, sampled per sender in proportion to how
+                         much each one wrote
+            seed: Seed of the sample
+        """
         self.df = df
+        self.sample_size = sample_size
+        self.patterns = resources.get('topic_patterns')
+        self.seed = seed
         
     def analyze(self, n_topics: int = 4) -> Slide9Data:
         """
@@ -138,13 +180,20 @@ class TopicModeler:
             Slide9Data with discovered topics and keywords
         """
         # Filter text messages and remove very short ones
-        text_df = self.df[self.df['message_type'] == 'text'].copy()
+        df = with_message_features(self.df)
+        text_df = df[df['message_type'] == 'text'].copy()
         
         if len(text_df) < 20:
             return self._fallback_response()
         
-        # Preprocess messages
-        text_df['processed'] = text_df['message'].apply(self._preprocess)
+        # Approximate mode: a seeded sample that keeps every sender's share
+        if self.sample_size and len(text_df) > self.sample_size:
+            per_sender = proportional_allocation(text_df['sender'].value_counts(), self.sample_size)
+            text_df = stratified_sample(text_df, 'sender', per_sender, self.seed)
+        sample_size = len(text_df) if self.sample_size else None
+        
+        # Preprocess the lowercased messages from the shared feature stage
+        text_df['processed'] = text_df['text_lower'].apply(self._preprocess)
         
         # Filter out empty/too short messages
         text_df = text_df[text_df['processed'].str.len() >= 10]
@@ -155,7 +204,7 @@ class TopicModeler:
         
         try:
             # Pattern-based topic detection (more reliable for casual chats)
-            pattern_topics = self._detect_pattern_topics(text_df['message'].tolist())
+            pattern_topics = self._detect_pattern_topics(text_df['text_lower'].tolist())
             
             # LDA-based topic modeling for additional discovery
             lda_topics = self._lda_topic_modeling(documents, n_topics)
@@ -181,31 +230,29 @@ class TopicModeler:
         
         return Slide9Data(
             topics=final_topics,
-            methodology=methodology
+            methodology=methodology,
+            sample_size=sample_size
         )
     
     def _preprocess(self, text: str) -> str:
-        """Enhanced preprocessing for Hinglish text."""
-        # Convert to lowercase
-        text = text.lower()
-        
+        """Enhanced preprocessing for lowercased Hinglish text."""
         # Remove URLs
-        text = re.sub(r'https?://\S+|www\.\S+', '', text)
+        text = self.patterns['url'].sub('', text)
         
         # Remove @mentions
-        text = re.sub(r'@\S+', '', text)
+        text = self.patterns['mention'].sub('', text)
         
         # Remove phone numbers
-        text = re.sub(r'\d{10,}', '', text)
+        text = self.patterns['phone'].sub('', text)
         
         # Remove excessive emojis but keep text
-        text = re.sub(r'[😀-🙏🌀-🗿🚀-🛿✂-➰Ⓜ-🉑]+', '', text)
+        text = self.patterns['emoji'].sub('', text)
         
         # Keep alphanumeric and spaces
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
+        text = self.patterns['non_alphanumeric'].sub(' ', text)
         
         # Remove numbers standalone
-        text = re.sub(r'\b\d+\b', '', text)
+        text = self.patterns['number'].sub('', text)
         
         # Remove extra whitespace
         text = ' '.join(text.split())
@@ -216,12 +263,11 @@ class TopicModeler:
         return ' '.join(words)
     
     def _detect_pattern_topics(self, messages: List[str]) -> List[Topic]:
-        """Detect topics using pattern matching - more reliable for casual chats."""
+        """Detect topics in lowercased messages using pattern matching - more reliable for casual chats."""
         topic_scores = {name: 0 for name in self.TOPIC_PATTERNS.keys()}
         topic_keywords = {name: Counter() for name in self.TOPIC_PATTERNS.keys()}
         
-        for msg in messages:
-            msg_lower = msg.lower()
+        for msg_lower in messages:
             for topic_name, config in self.TOPIC_PATTERNS.items():
                 for keyword in config['keywords']:
                     if keyword in msg_lower:
@@ -255,6 +301,8 @@ class TopicModeler:
     
     def _lda_topic_modeling(self, documents: List[str], n_topics: int) -> List[Topic]:
         """Traditional LDA topic modeling as backup."""
+        TfidfVectorizer, LatentDirichletAllocation = resources.get('lda_estimators')
+        
         try:
             # TF-IDF with adjusted parameters for short casual texts
             vectorizer = TfidfVectorizer(
@@ -262,7 +310,7 @@ class TopicModeler:
                 min_df=max(2, len(documents) // 50),
                 max_df=0.7,
                 ngram_range=(1, 2),  # Include bigrams
-                stop_words=list(self.STOPWORDS)
+                stop_words=resources.get('topic_stopwords')
             )
             
             tfidf_matrix = vectorizer.fit_transform(documents)
@@ -288,7 +336,7 @@ class TopicModeler:
     
     def _extract_lda_topics(
         self, 
-        lda: LatentDirichletAllocation, 
+        lda: "LatentDirichletAllocation", 
         feature_names: List[str]
     ) -> List[Topic]:
         """Extract topics from LDA model."""
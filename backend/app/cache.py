@@ -0,0 +1,257 @@
+"""
+Result Cache
+Content-addressed cache of analysis results, so repeat uploads skip the pipeline
+"""
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
+
+from .config import settings
+from .models.schemas import WrappedData
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever parser or analyzer output changes, so stale results are not served
+ANALYSIS_VERSION = 2
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_key(source: Union[BinaryIO, bytes]) -> str:
+    """
+    Hash an export into a cache key.
+    
+    The content is normalized first, so the same chat saved with a BOM or
+    Windows line endings maps to the same key; the analysis version and
+    message limits are mixed in so results from older code or other settings
+    never match. File objects are read from their current position to the
+    end and rewound.
+    """
+    digest = hashlib.sha256(f"{settings.APP_VERSION}:{ANALYSIS_VERSION}:{_settings_fingerprint()}\n".encode())
+    if isinstance(source, bytes):
+        digest.update(source.removeprefix(b'\xef\xbb\xbf').replace(b'\r\n', b'\n'))
+        return digest.hexdigest()
+    
+    start = source.tell()
+    carry = source.read(3).removeprefix(b'\xef\xbb\xbf')
+    while chunk := source.read(HASH_CHUNK_SIZE):
+        # A trailing '\r' may pair with a '\n' at the start of the next chunk
+        data = carry + chunk
+        split = len(data) - 1 if data.endswith(b'\r') else len(data)
+        digest.update(data[:split].replace(b'\r\n', b'\n'))
+        carry = data[split:]
+    digest.update(carry.replace(b'\r\n', b'\n'))
+    source.seek(start)
+    return digest.hexdigest()
+
+
+def _settings_fingerprint() -> str:
+    """Settings that change analysis results."""
+    return ':'.join(str(value) for value in (
+        settings.MAX_MESSAGES,
+        settings.MESSAGE_LIMIT_POLICY,
+        settings.APPROXIMATE_THRESHOLD,
+        settings.SENTIMENT_SAMPLE_PER_MONTH,
+        settings.TOPIC_SAMPLE_SIZE,
+        settings.SAMPLE_SEED,
+        settings.MEMORY_BUDGET_MB,
+        settings.MEMORY_BUDGET_POLICY
+    ))
+
+
+class ResultCache:
+    """
+    LRU cache of WrappedData by content key.
+    
+    Entries live in memory until they are older than ``ttl_seconds`` or, least
+    recently used first, until their JSON sizes add up to more than
+    ``max_bytes``. With a ``path`` every entry is also written to a SQLite
+    file, pruned by the same TTL and by ``max_disk_bytes``, from which memory
+    misses are refilled, so results survive restarts.
+    
+    Partial results (see the ``slides`` selector) are merged into the entry
+    for the same content, and a lookup hits when all requested slides are
+    present.
+    """
+    
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        path: Optional[str] = None,
+        max_disk_bytes: int = 0
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[WrappedData, int, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, payload BLOB NOT NULL, "
+                "message_count INTEGER NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether results are cached at all."""
+        return self.max_bytes > 0
+    
+    def get(self, key: str, slides: Optional[Iterable[str]] = None) -> Optional[Tuple[WrappedData, int]]:
+        """
+        Get the cached (wrapped data, message count) for a key.
+        
+        Args:
+            key: Content key from content_key()
+            slides: Slides that must be present, which are the only ones
+                    returned; all 10 by default
+        """
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            entry = self._get_memory(key)
+            from_disk = False
+            if entry is None and self._db is not None:
+                entry = self._get_disk(key)
+                from_disk = entry is not None
+            
+            selected = _slide_names(slides)
+            if entry is None or not all(getattr(entry[0], name) is not None for name in selected):
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self.disk_hits += from_disk
+            wrapped_data, message_count = entry
+            if slides is not None:
+                wrapped_data = WrappedData(**{name: getattr(wrapped_data, name) for name in selected})
+            return wrapped_data, message_count
+    
+    def put(self, key: str, wrapped_data: WrappedData, message_count: int) -> None:
+        """Store a result, merging it with slides already cached for the key."""
+        if not self.enabled:
+            return
+        
+        with self._lock:
+            cached = self._get_memory(key) or (self._get_disk(key) if self._db is not None else None)
+            if cached is not None:
+                wrapped_data = WrappedData(**{
+                    name: getattr(cached[0], name) if getattr(wrapped_data, name) is None else getattr(wrapped_data, name)
+                    for name in _slide_names(None)
+                })
+            
+            payload = wrapped_data.model_dump_json().encode()
+            self._put_memory(key, wrapped_data, message_count, len(payload))
+            if self._db is not None:
+                self._put_disk(key, payload, message_count)
+    
+    def delete(self, key: str) -> None:
+        """Drop a key from memory and disk."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+            if self._db is not None:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.commit()
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size."""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes
+        }
+    
+    def close(self) -> None:
+        """Close the on-disk tier."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+    
+    def _get_memory(self, key: str) -> Optional[Tuple[WrappedData, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        wrapped_data, message_count, size, stored_at = entry
+        if time.time() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self._bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return wrapped_data, message_count
+    
+    def _put_memory(self, key: str, wrapped_data: WrappedData, message_count: int, size: int, stored_at: Optional[float] = None) -> None:
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[2]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (wrapped_data, message_count, size, stored_at or time.time())
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+    
+    def _get_disk(self, key: str) -> Optional[Tuple[WrappedData, int]]:
+        row = self._db.execute(
+            "SELECT payload, message_count, stored_at FROM results WHERE key = ? AND stored_at > ?",
+            (key, time.time() - self.ttl_seconds)
+        ).fetchone()
+        if row is None:
+            return None
+        payload, message_count, stored_at = row
+        try:
+            wrapped_data = WrappedData.model_validate_json(payload)
+        except ValueError:
+            logger.warning(f"Dropping unreadable cache entry {key}")
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        self._put_memory(key, wrapped_data, message_count, len(payload), stored_at)
+        return wrapped_data, message_count
+    
+    def _put_disk(self, key: str, payload: bytes, message_count: int) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, payload, message_count, stored_at) VALUES (?, ?, ?, ?)",
+            (key, payload, message_count, time.time())
+        )
+        # Prune expired entries, then the oldest ones while over the size limit
+        self._db.execute("DELETE FROM results WHERE stored_at <= ?", (time.time() - self.ttl_seconds,))
+        if self.max_disk_bytes:
+            total = 0
+            rows = self._db.execute("SELECT key, length(payload) FROM results ORDER BY stored_at DESC").fetchall()
+            stale = []
+            for row_key, size in rows:
+                total += size
+                if total > self.max_disk_bytes:
+                    stale.append((row_key,))
+            self._db.executemany("DELETE FROM results WHERE key = ?", stale)
+        self._db.commit()
+
+
+def _slide_names(slides: Optional[Iterable[str]]) -> List[str]:
+    """The given slide names, or all of them."""
+    return list(slides) if slides is not None else list(WrappedData.model_fields)
+
+
+result_cache = ResultCache(
+    max_bytes=int(settings.RESULT_CACHE_MAX_MB * 1024 * 1024),
+    ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    path=settings.RESULT_CACHE_PATH or None,
+    max_disk_bytes=int(settings.RESULT_CACHE_DISK_MAX_MB * 1024 * 1024)
+)
@@ -2,7 +2,7 @@
 Application configuration
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 import os
 
 
@@ -12,9 +12,82 @@ class Settings(BaseSettings):
     APP_VERSION: str = "1.0.0"
     DEBUG: bool = False
     
-    # Processing limits
+    # DEBUG only: POST /api/upload?profile=true answers with a cProfile report
+    # of that upload; a directory here also keeps each profile, as
+    # <session_id>.prof in pstats format (e.g. for snakeviz)
+    PROFILE_DIR: str = ""
+    
+    # Processing limits: larger uploads are rejected with 413, longer chats
+    # are cut at MAX_MESSAGES ("truncate") or sampled evenly ("sample")
     MAX_FILE_SIZE_MB: int = 10
     MAX_MESSAGES: int = 100000
+    MESSAGE_LIMIT_POLICY: Literal["truncate", "sample"] = "truncate"
+    
+    # Approximate mode for chats with at least this many messages (0 = never):
+    # sentiment scores a sample per month, topics model a sample per sender
+    APPROXIMATE_THRESHOLD: int = 20000
+    SENTIMENT_SAMPLE_PER_MONTH: int = 1000
+    TOPIC_SAMPLE_SIZE: int = 5000
+    SAMPLE_SEED: int = 42
+    
+    # Memory: chats projected (from size and line count) to need more than
+    # MEMORY_BUDGET_MB are rejected with 413 ("reject") or sampled down to
+    # what fits ("sample"); 0 = no budget. TRACK_MEMORY measures the peak and
+    # net allocations of each stage with tracemalloc and reports them with
+    # the timings; it slows analysis down, runs analyzers one at a time and
+    # analyzes one upload at a time per process
+    MEMORY_BUDGET_MB: float = 0
+    MEMORY_BUDGET_POLICY: Literal["reject", "sample"] = "sample"
+    TRACK_MEMORY: bool = False
+    
+    # Uploads at least this large are parsed on several processes
+    PARALLEL_PARSE_THRESHOLD_MB: float = 5
+    PARSE_WORKERS: int = 0  # 0 = one per CPU
+    
+    # Per-stage timings in the Server-Timing header of /api/upload, and
+    # their histograms at /metrics
+    METRICS_ENABLED: bool = True
+    
+    # Analyzers and their shared resources (VADER lexicon, emoji tables,
+    # compiled patterns, scikit-learn) load on first use unless warmed up:
+    # on a background thread at startup (GET /ready answers 503 until done),
+    # or when the app is imported, before a pre-forking server forks
+    WARMUP_ON_STARTUP: bool = True
+    PRELOAD_RESOURCES: bool = False
+    
+    # Parsing and analysis run off the event loop: "thread" suits the
+    # GIL-releasing pandas/numpy work, "process" the pure-Python analyzers
+    ANALYSIS_EXECUTOR: Literal["thread", "process"] = "thread"
+    ANALYSIS_WORKERS: int = 4
+    ANALYSIS_QUEUE_LIMIT: int = 16  # uploads waiting for a worker before 503s
+    
+    # Analyzers of one upload run side by side on their own pool
+    ANALYZER_EXECUTOR: Literal["thread", "process"] = "thread"
+    ANALYZER_WORKERS: int = 4
+    
+    # Batch uploads (/api/upload/batch): files per request, their combined
+    # size, and the processes the chats are analyzed on (0 = one per CPU)
+    BATCH_MAX_FILES: int = 20
+    BATCH_MAX_TOTAL_MB: int = 100
+    BATCH_WORKERS: int = 0
+    
+    # Background jobs (/api/jobs): pool size, waiting jobs before 503s, and
+    # how long and how much finished results are kept for polling
+    JOB_WORKERS: int = 2
+    JOB_QUEUE_LIMIT: int = 32
+    JOB_TTL_SECONDS: int = 600
+    JOB_RESULTS_MAX_MB: float = 64
+    
+    # Results of repeat uploads are served from a cache keyed by content hash;
+    # a SQLite path adds a tier that survives restarts. 0 MB disables it
+    RESULT_CACHE_MAX_MB: float = 64
+    RESULT_CACHE_TTL_SECONDS: int = 3600
+    RESULT_CACHE_PATH: str = ""
+    RESULT_CACHE_DISK_MAX_MB: float = 512
+    
+    # Parsed chats and slides are kept per session_id for re-fetching
+    SESSION_TTL_SECONDS: int = 1800  # since last access
+    SESSION_MAX_MB: float = 256
     
     class Config:
         env_file = ".env"
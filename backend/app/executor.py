@@ -0,0 +1,182 @@
+"""
+Analysis Executor
+Runs CPU-bound parsing and analysis off the asyncio event loop
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from .config import settings
+from .resources import resources
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+_thread_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def get_executor() -> Executor:
+    """Get the shared analysis executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        if settings.ANALYSIS_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.ANALYSIS_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_WORKERS,
+                thread_name_prefix="analysis"
+            )
+        logger.info(f"Started {settings.ANALYSIS_EXECUTOR} executor with {settings.ANALYSIS_WORKERS} workers")
+    return _executor
+
+
+def _acquire_slot() -> None:
+    """Count a call against the in-flight limit, or raise ExecutorBusyError."""
+    global _in_flight
+    if _in_flight >= settings.ANALYSIS_WORKERS + settings.ANALYSIS_QUEUE_LIMIT:
+        raise ExecutorBusyError(f"{_in_flight} analyses already in flight")
+    _in_flight += 1
+
+
+def _release_slot(*_: Any) -> None:
+    """Give back a slot taken by _acquire_slot."""
+    global _in_flight
+    _in_flight -= 1
+
+
+async def run_in_executor(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run ``func(*args)`` in the analysis executor and await its result.
+    
+    At most ANALYSIS_WORKERS calls run at once and ANALYSIS_QUEUE_LIMIT more
+    may wait for a worker; beyond that ExecutorBusyError is raised at once.
+    If a worker process dies, the call raises BrokenProcessPool and the next
+    one starts a new pool.
+    """
+    _acquire_slot()
+    try:
+        if _executor is None and settings.ANALYSIS_EXECUTOR == "process":
+            await _before_fork()
+        executor = get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            _drop_broken_pool(executor)
+            raise
+    finally:
+        _release_slot()
+
+
+async def _before_fork() -> None:
+    """
+    Let a running resource warm-up finish before worker processes are forked:
+    a child forked while the warm-up thread holds an import or registry lock
+    inherits that lock held and deadlocks on it. Waiting also means the
+    workers share the preloaded resources rather than building their own.
+    """
+    await asyncio.to_thread(resources.wait_for_warm_up)
+
+
+def _drop_broken_pool(executor: Executor) -> None:
+    """
+    Forget a process pool that lost a worker (e.g. to the OOM killer): a
+    broken pool refuses all further work, so the next call creates a new one.
+    """
+    global _executor, _batch_executor
+    if executor is _executor:
+        _executor = None
+    elif executor is _batch_executor:
+        _batch_executor = None
+    else:
+        return  # already replaced by a concurrent call
+    logger.warning("A worker process died; the process pool will be recreated")
+    executor.shutdown(wait=False)
+
+
+def submit_to_thread(func: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+    """
+    Start ``func(*args)`` on an analysis thread and return its future.
+    
+    For work that reports back through callbacks, which cannot cross into a
+    worker process: uses the analysis executor in thread mode and a thread
+    pool of the same size otherwise. Counts against the same in-flight limit
+    as run_in_executor and raises ExecutorBusyError before starting.
+    """
+    global _thread_executor
+    if settings.ANALYSIS_EXECUTOR == "thread":
+        executor = get_executor()
+    else:
+        if _thread_executor is None:
+            _thread_executor = ThreadPoolExecutor(
+                max_workers=settings.ANALYSIS_WORKERS,
+                thread_name_prefix="analysis"
+            )
+        executor = _thread_executor
+    
+    _acquire_slot()
+    future = asyncio.get_running_loop().run_in_executor(executor, func, *args)
+    future.add_done_callback(_release_slot)
+    return future
+
+
+def get_batch_executor() -> ProcessPoolExecutor:
+    """Get the process pool batch uploads fan out on, creating it on first use."""
+    global _batch_executor
+    if _batch_executor is None:
+        workers = settings.BATCH_WORKERS or os.cpu_count() or 1
+        _batch_executor = ProcessPoolExecutor(max_workers=workers)
+        logger.info(f"Started batch process pool with {workers} workers")
+    return _batch_executor
+
+
+async def map_in_processes(func: Callable[..., Any], calls: Iterable[Sequence[Any]]) -> List[Any]:
+    """
+    Run ``func(*args)`` for each ``args`` of ``calls`` on the batch process
+    pool and await all of them.
+    
+    Returns the results in order, with the exception in place of the result
+    for calls that raised (BrokenProcessPool if a worker died, after which
+    the next batch starts a new pool). The whole batch counts as one call
+    against the in-flight limit of run_in_executor and raises
+    ExecutorBusyError before starting.
+    """
+    _acquire_slot()
+    try:
+        if _batch_executor is None:
+            await _before_fork()
+        loop = asyncio.get_running_loop()
+        executor = get_batch_executor()
+        try:
+            futures = [loop.run_in_executor(executor, func, *args) for args in calls]
+        except BrokenProcessPool:
+            _drop_broken_pool(executor)
+            raise
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        if any(isinstance(result, BrokenProcessPool) for result in results):
+            _drop_broken_pool(executor)
+        return results
+    finally:
+        _release_slot()
+
+
+def shutdown_executor() -> None:
+    """Shut down the analysis executors, waiting for running work to finish."""
+    global _executor, _thread_executor, _batch_executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    if _thread_executor is not None:
+        _thread_executor.shutdown(wait=True)
+        _thread_executor = None
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=True)
+        _batch_executor = None
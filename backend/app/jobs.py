@@ -0,0 +1,148 @@
+"""
+Background Jobs
+Bounded in-process worker pool for analyses whose results are polled
+"""
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .config import settings
+from .executor import ExecutorBusyError
+
+logger = logging.getLogger(__name__)
+
+# Progress steps reported for every job, in the order they usually finish
+JOB_STEPS = ['parse'] + [f'slide{n}' for n in range(1, 11)]
+
+
+class Job:
+    """A background analysis and its progress."""
+    
+    def __init__(self):
+        self.id = str(uuid.uuid4())
+        self.status = 'queued'
+        self.progress = {step: 'pending' for step in JOB_STEPS}
+        self.message: Optional[str] = None
+        self.result: Optional[BaseModel] = None
+        self.result_bytes = 0
+        self.finished_at: Optional[float] = None
+    
+    @property
+    def finished(self) -> bool:
+        # Eviction orders finished jobs by finished_at, so that decides
+        return self.finished_at is not None
+    
+    def step_done(self, step: str, result: Any = None) -> None:
+        """Mark a progress step as done."""
+        self.progress[step] = 'done'
+        if step == 'parse':
+            self.status = 'analyzing'
+
+
+class JobManager:
+    """
+    Runs jobs on a fixed number of worker threads.
+    
+    At most ``max_workers + queue_limit`` jobs may be queued or running;
+    further submissions raise ExecutorBusyError. Finished jobs are kept for
+    ``ttl_seconds`` and, oldest first, dropped early once their results
+    together take more than ``max_result_bytes`` as JSON.
+    """
+    
+    def __init__(self, max_workers: int, queue_limit: int, ttl_seconds: float, max_result_bytes: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.ttl_seconds = ttl_seconds
+        self.max_result_bytes = max_result_bytes
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    @property
+    def queued(self) -> int:
+        """Jobs waiting for a worker."""
+        return sum(job.status == 'queued' for job in list(self._jobs.values()))
+    
+    @property
+    def running(self) -> int:
+        """Jobs being processed."""
+        return sum(not job.finished and job.status != 'queued' for job in list(self._jobs.values()))
+    
+    @property
+    def accepting(self) -> bool:
+        """Whether a new job would be accepted."""
+        return self.queued + self.running < self.max_workers + self.queue_limit
+    
+    def submit(self, func: Callable[[Job], Tuple[BaseModel, str]]) -> Job:
+        """
+        Queue ``func(job)``, which returns (result, message) and may report
+        progress through ``job.step_done``; a ValueError marks the job failed
+        with its message.
+        """
+        with self._lock:
+            self._evict()
+            if not self.accepting:
+                raise ExecutorBusyError(f"{self.queued} jobs queued")
+            job = Job()
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        
+        self._executor.submit(self._run, job, func)
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id, or None if it is unknown or was evicted."""
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+    
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running jobs."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+    
+    def _run(self, job: Job, func: Callable[[Job], Tuple[BaseModel, str]]) -> None:
+        job.status = 'parsing'
+        status = 'failed'
+        try:
+            job.result, job.message = func(job)
+            job.result_bytes = len(job.result.model_dump_json())
+            status = 'completed'
+        except ValueError as e:
+            job.message = str(e)
+        except Exception as e:
+            logger.error(f"Error processing job {job.id}: {str(e)}")
+            job.message = f"Error processing chat: {str(e)}"
+        finally:
+            # A job is finished once finished_at is set; the status follows
+            job.finished_at = time.monotonic()
+            job.status = status
+    
+    def _evict(self) -> None:
+        """Drop expired jobs, then the oldest finished ones while over the memory limit."""
+        now = time.monotonic()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at
+        )
+        total_bytes = sum(job.result_bytes for job in finished)
+        for job in finished:
+            if now - job.finished_at < self.ttl_seconds and total_bytes <= self.max_result_bytes:
+                break
+            del self._jobs[job.id]
+            total_bytes -= job.result_bytes
+
+
+job_manager = JobManager(
+    max_workers=settings.JOB_WORKERS,
+    queue_limit=settings.JOB_QUEUE_LIMIT,
+    ttl_seconds=settings.JOB_TTL_SECONDS,
+    max_result_bytes=int(settings.JOB_RESULTS_MAX_MB * 1024 * 1024)
+)
@@ -3,11 +3,24 @@ FastAPI Main Application
 Entry point for the WhatsApp Wrapped backend
 """
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import analytics
 from .config import settings
-from .routes.upload import router as upload_router
+from .executor import shutdown_executor
+from .middleware import BodySizeLimitMiddleware, MULTIPART_OVERHEAD
+from .jobs import job_manager
+from .cache import result_cache
+from .sessions import session_store
+from .resources import resources
+from .metrics import pipeline_metrics
+from .routes.upload import router as upload_router, FILE_TOO_LARGE_DETAIL
+from .routes.jobs import router as jobs_router
+from .routes.session import router as session_router
+from .routes.batch import router as batch_router, BATCH_TOO_LARGE_DETAIL
 
 # Configure logging
 logging.basicConfig(
@@ -17,13 +30,49 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Build the analyzers' shared resources now, at import: under a pre-forking
+# server (gunicorn --preload) workers then share them copy-on-write
+if settings.PRELOAD_RESOURCES:
+    analytics.import_analyzers()
+    resources.preload()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start warming up the analyzers, and shut the analysis, batch and job
+    executors and the result cache down with the app.
+    """
+    if settings.WARMUP_ON_STARTUP:
+        resources.warm_up(analytics.import_analyzers)
+    yield
+    job_manager.shutdown()
+    shutdown_executor()
+    result_cache.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Analyze WhatsApp chat exports and generate a Spotify Wrapped-style experience",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
+)
+
+# Reject oversized uploads while they arrive instead of spooling them whole
+# (added before CORS so that the 413 still gets CORS headers)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=settings.MAX_FILE_SIZE_MB * 1024 * 1024 + MULTIPART_OVERHEAD,
+    detail=FILE_TOO_LARGE_DETAIL,
+    path_limits={
+        "/api/upload/batch": (
+            settings.BATCH_MAX_TOTAL_MB * 1024 * 1024 + settings.BATCH_MAX_FILES * MULTIPART_OVERHEAD,
+            BATCH_TOO_LARGE_DETAIL
+        )
+    }
 )
 
 # Configure CORS - supports CORS_ORIGINS env var (comma-separated URLs)
@@ -37,6 +86,9 @@ app.add_middleware(
 
 # Include routers
 app.include_router(upload_router, prefix="/api", tags=["Upload & Analysis"])
+app.include_router(batch_router, prefix="/api", tags=["Batch Upload"])
+app.include_router(jobs_router, prefix="/api", tags=["Background Jobs"])
+app.include_router(session_router, prefix="/api", tags=["Sessions"])
 
 
 @app.get("/")
@@ -56,18 +108,76 @@ async def health_check():
         "status": "healthy",
         "app": settings.APP_NAME,
         "version": settings.APP_VERSION,
+        "queue_depth": job_manager.queued,
+        "result_cache": result_cache.stats(),
+        "sessions": len(session_store),
+        "resources_loaded": len(resources.loaded),
         "message": "WhatsApp Wrapped is ready to analyze your chats!"
     }
 
 
+@app.get("/ready")
+async def readiness_check(
+    response: Response,
+    warm: bool = Query(False, description="Start warming up the analyzers if that has not started yet")
+):
+    """
+    Readiness probe: 503 while the analyzers warm up in the background,
+    200 otherwise (without a warm-up they load on first use).
+    """
+    if warm:
+        resources.warm_up(analytics.import_analyzers)
+    
+    warming = resources.warmup_state == 'warming'
+    if warming:
+        response.status_code = 503
+    return {
+        "status": "warming" if warming else "ready",
+        "warmup": resources.warmup_state,
+        "resources_loaded": len(resources.loaded),
+        "resources_registered": len(resources.registered)
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline stage and upload size histograms in the Prometheus text format."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return PlainTextResponse(pipeline_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # Privacy notice endpoint
 @app.get("/api/privacy")
 async def privacy_notice():
     """Return privacy information."""
     return {
-        "notice": "All processing happens on our servers but is ephemeral.",
-        "data_retention": "None - your chat data is processed and immediately discarded.",
-        "storage": "No database, no logs of chat content.",
+        "notice": "All processing happens on our servers. Nothing is kept for good, but results are kept for a while.",
+        "data_retention": (
+            "Your uploaded file itself is discarded once it is analyzed. "
+            "The parsed chat (every message, with names and timestamps) and its slides are kept in server memory "
+            f"for {settings.SESSION_TTL_SECONDS // 60} minutes after the session was last used, so they can be fetched again, "
+            f"or until newer sessions push them out of the {settings.SESSION_MAX_MB:g}MB kept for sessions. "
+            + (
+                "The computed slides (names, top words and emojis, quotes) are cached in memory by a hash of the file, "
+                f"for up to {settings.RESULT_CACHE_TTL_SECONDS // 60} minutes within {settings.RESULT_CACHE_MAX_MB:g}MB, "
+                "so repeat uploads are instant. "
+                if settings.RESULT_CACHE_MAX_MB > 0 else ""
+            )
+            + f"Results of background jobs are kept for {settings.JOB_TTL_SECONDS // 60} minutes after they finish, "
+            f"within {settings.JOB_RESULTS_MAX_MB:g}MB. "
+            "DELETE /api/session/{id} removes a session and its cached slides at once."
+        ),
+        "storage": (
+            "Sessions, job results and the result cache live in server memory and are lost on restart. "
+            + (
+                "Cached slides, including names, top words and quotes, are also written to a SQLite file on the server "
+                f"for up to {settings.RESULT_CACHE_TTL_SECONDS // 60} minutes, so they survive restarts. "
+                if settings.RESULT_CACHE_PATH and settings.RESULT_CACHE_MAX_MB > 0 else
+                "Nothing is written to disk. "
+            )
+            + "Chat content is never logged."
+        ),
         "tracking": "No analytics tracking of users.",
         "commitment": "We take your privacy seriously. Your conversations are yours."
     }
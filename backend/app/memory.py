@@ -0,0 +1,117 @@
+"""
+Memory Accounting
+Per-stage allocation tracking (tracemalloc) and the per-request memory budget
+"""
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+# Projected peak of one upload's pipeline: the parsed frame and the copies,
+# features, TF-IDF matrix etc. the analyzers build on it, per message and
+# per byte of export text (measured with TRACK_MEMORY on synthetic chats)
+PEAK_BYTES_PER_MESSAGE = 1800
+PEAK_BYTES_PER_TEXT_BYTE = 6
+
+LINE_COUNT_CHUNK_SIZE = 1024 * 1024
+
+
+class MemoryBudgetError(ValueError):
+    """Raised when a chat is projected to need more than MEMORY_BUDGET_MB."""
+
+
+@contextmanager
+def traced_memory() -> Iterator[List[int]]:
+    """
+    Measure the memory the enclosed block allocates with tracemalloc,
+    starting it if needed.
+    
+    Yields a list that holds [peak, net] bytes once the block exits: the
+    highest traced memory above the starting point, and what was still
+    allocated at the end. Blocks may nest, also across threads as long as
+    each inner block closes before its outer one. Traced memory and its peak
+    are process-wide, so blocks that overlap without nesting would measure
+    each other: concurrent pipelines take turns with tracked_pipeline.
+    
+    tracemalloc is stopped again once the last open block exits, unless it
+    was already tracing before the first one.
+    """
+    global _started
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started = True
+        start, peak = tracemalloc.get_traced_memory()
+        # Resetting the peak for this block loses the enclosing block's peak
+        # so far; keep it on the stack
+        if _peaks:
+            _peaks[-1] = max(_peaks[-1], peak)
+        _peaks.append(start)
+        tracemalloc.reset_peak()
+    usage = [0, 0]
+    try:
+        yield usage
+    finally:
+        with _lock:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, _peaks.pop())
+            if _peaks:
+                _peaks[-1] = max(_peaks[-1], peak)
+            elif _started:
+                tracemalloc.stop()
+                _started = False
+            usage[:] = [peak - start, current - start]
+
+
+@contextmanager
+def tracked_pipeline() -> Iterator[List[int]]:
+    """
+    Measure one whole pipeline whose stages are traced_memory blocks, while
+    other tracked pipelines wait for it to finish.
+    
+    Keeps tracemalloc running between the stages, and yields the
+    pipeline's own [peak, net] bytes like traced_memory.
+    """
+    with _pipeline_lock, traced_memory() as usage:
+        yield usage
+
+
+# Highest traced memory seen by each open traced_memory block, innermost last
+_peaks: List[int] = []
+# Whether the outermost block started tracemalloc, so the last one stops it
+_started = False
+_lock = threading.Lock()
+_pipeline_lock = threading.Lock()
+
+
+def count_lines(source: Union[BinaryIO, bytes]) -> int:
+    """
+    Count the lines of an export without decoding it. File objects are
+    read from their current position to the end and rewound.
+    """
+    if isinstance(source, bytes):
+        return source.count(b'\n') + 1
+    start = source.tell()
+    lines = 1
+    while chunk := source.read(LINE_COUNT_CHUNK_SIZE):
+        lines += chunk.count(b'\n')
+    source.seek(start)
+    return lines
+
+
+def projected_peak_bytes(size: int, line_count: int) -> int:
+    """Projected peak memory of analyzing an export of ``size`` bytes and ``line_count`` lines."""
+    return int(line_count * PEAK_BYTES_PER_MESSAGE + size * PEAK_BYTES_PER_TEXT_BYTE)
+
+
+def messages_within_budget(size: int, line_count: int, budget_bytes: int) -> Optional[int]:
+    """
+    How many messages of an export fit the budget, or None if all of them do.
+    
+    Lines stand in for messages, which makes the projection err on the
+    large side for chats with multi-line messages.
+    """
+    projected = projected_peak_bytes(size, line_count)
+    if projected <= budget_bytes:
+        return None
+    return int(line_count * budget_bytes / projected)
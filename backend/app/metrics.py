@@ -0,0 +1,188 @@
+"""
+Pipeline Metrics
+Per-request stage timings (Server-Timing) and Prometheus histograms (/metrics)
+"""
+import math
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .memory import traced_memory
+from .profiling import PipelineProfile
+
+# Histogram buckets: stage seconds, chat sizes in messages and upload bytes
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+MESSAGE_BUCKETS = (100, 1_000, 5_000, 10_000, 25_000, 50_000, 100_000)
+BYTE_BUCKETS = tuple(kb * 1024 for kb in (10, 100, 500, 1024, 2048, 5120, 10240))
+MEMORY_BUCKETS = tuple(mb * 2**20 for mb in (1, 10, 50, 100, 250, 500, 1024, 2048, 4096))
+
+# Stage timings are labelled with the chat's size class, so latency can be
+# compared between small and large chats
+SIZE_CLASSES = (1_000, 10_000, 50_000)
+
+
+class StageTimer:
+    """
+    Wall time of the stages of one request, in the order they ran. Given a
+    profile, the stages are also profiled into it, and with
+    ``track_memory`` their peak and net allocations are kept in ``memory``.
+    """
+    
+    def __init__(self, profile: Optional[PipelineProfile] = None, track_memory: bool = False):
+        self.timings: Dict[str, float] = {}
+        self.memory: Dict[str, Tuple[int, int]] = {}  # stage -> (peak, net) bytes
+        self.profile = profile
+        self.track_memory = track_memory
+    
+    @contextmanager
+    def stage(self, name: str, instrumented: bool = True) -> Iterator[None]:
+        """
+        Add the wall time of the enclosed block to the stage ``name``.
+        
+        Stages that only wait for work on other threads, which is profiled
+        and measured separately, pass ``instrumented=False``.
+        """
+        profiling = self.profile.stage(name) if self.profile is not None and instrumented else nullcontext()
+        tracing = traced_memory() if self.track_memory and instrumented else nullcontext()
+        usage = None
+        start = time.perf_counter()
+        try:
+            with tracing as usage, profiling:
+                yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+            if usage:
+                self.memory[name] = tuple(usage)
+    
+    def add(self, name: str, seconds: float) -> None:
+        """Add ``seconds`` to the stage ``name``."""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+    
+    def update(self, timings: Dict[str, float], prefix: str = '') -> None:
+        """Add timings measured elsewhere, e.g. by the parser or scheduler."""
+        for name, seconds in timings.items():
+            self.add(prefix + name, seconds)
+
+
+def server_timing(timings: Dict[str, float], memory: Optional[Dict[str, Tuple[int, int]]] = None) -> str:
+    """
+    Render stage timings as a Server-Timing header value (milliseconds),
+    with the peak and net allocations of stages that have them as ``desc``.
+    """
+    entries = []
+    for name, seconds in timings.items():
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if memory and name in memory:
+            peak, net = memory[name]
+            entry += f';desc="peak {peak / 2**20:.1f}MB, net {net / 2**20:+.1f}MB"'
+        entries.append(entry)
+    return ', '.join(entries)
+
+
+def size_class(message_count: int) -> str:
+    """Label of the SIZE_CLASSES bucket a chat falls in, e.g. '<=10000'."""
+    for bound in SIZE_CLASSES:
+        if message_count <= bound:
+            return f"<={bound}"
+    return f">{SIZE_CLASSES[-1]}"
+
+
+class Histogram:
+    """A Prometheus histogram with labels."""
+    
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets) + (math.inf,)
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}  # labels -> (bucket counts, [sum])
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels: str) -> None:
+        """Count ``value`` in the series of the given labels."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            total[0] += value
+    
+    def render(self) -> List[str]:
+        """Lines of the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+                for bound, count in zip(self.buckets, counts):
+                    le = '+Inf' if bound == math.inf else _format_number(bound)
+                    bucket_labels = ','.join(labels + [f'le="{le}"'])
+                    lines.append(f"{self.name}_bucket{{{bucket_labels}}} {count}")
+                suffix = f"{{{','.join(labels)}}}" if labels else ''
+                lines.append(f"{self.name}_sum{suffix} {_format_number(total[0])}")
+                lines.append(f"{self.name}_count{suffix} {counts[-1]}")
+        return lines
+
+
+class PipelineMetrics:
+    """Histograms of the upload pipeline, fed with each request's timings."""
+    
+    def __init__(self):
+        self.stage_seconds = Histogram(
+            'wrapped_stage_duration_seconds',
+            'Wall time of each pipeline stage (parse sub-stages, features, each analyzer, serialization).',
+            SECONDS_BUCKETS, ('stage', 'messages')
+        )
+        self.upload_messages = Histogram(
+            'wrapped_upload_messages',
+            'Messages per analyzed chat.',
+            MESSAGE_BUCKETS, ('endpoint',)
+        )
+        self.upload_bytes = Histogram(
+            'wrapped_upload_bytes',
+            'Size of each uploaded chat export in bytes.',
+            BYTE_BUCKETS, ('endpoint',)
+        )
+        self.stage_peak_bytes = Histogram(
+            'wrapped_stage_peak_bytes',
+            'Peak memory allocated by each pipeline stage (only with TRACK_MEMORY).',
+            MEMORY_BUCKETS, ('stage', 'messages')
+        )
+    
+    def observe(
+        self,
+        endpoint: str,
+        timings: Dict[str, float],
+        message_count: int,
+        size: Optional[int],
+        memory: Optional[Dict[str, Tuple[int, int]]] = None
+    ) -> None:
+        """Record one analyzed chat."""
+        messages = size_class(message_count)
+        for stage, seconds in timings.items():
+            self.stage_seconds.observe(seconds, stage=stage, messages=messages)
+        for stage, (peak, _) in (memory or {}).items():
+            self.stage_peak_bytes.observe(peak, stage=stage, messages=messages)
+        self.upload_messages.observe(message_count, endpoint=endpoint)
+        if size is not None:
+            self.upload_bytes.observe(size, endpoint=endpoint)
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for histogram in (self.stage_seconds, self.upload_messages, self.upload_bytes, self.stage_peak_bytes):
+            lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Shared metrics for the process
+pipeline_metrics = PipelineMetrics()
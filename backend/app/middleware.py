@@ -0,0 +1,100 @@
+"""
+Request Body Limit
+ASGI middleware that rejects oversized uploads while they are still arriving
+"""
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    """Raised from ``receive`` to stop reading an oversized body."""
+
+
+class BodySizeLimitMiddleware:
+    """
+    Answer 413 as soon as a request body is known to exceed ``max_bytes``.
+    
+    A declared Content-Length over the limit is rejected before any of the
+    body is read. Otherwise the chunks are counted as the app receives them,
+    and reading stops at the first chunk past the limit; whatever response
+    the app then produces (FastAPI reports a failed form parse as 400) is
+    replaced by the 413.
+    
+    ``path_limits`` maps request paths to limits that replace ``max_bytes``
+    (and ``detail``) for them, e.g. for endpoints taking several files.
+    """
+    
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        max_bytes: int,
+        detail: str = "Request body too large.",
+        path_limits: Optional[Dict[str, Tuple[int, str]]] = None
+    ):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.detail = detail
+        self.path_limits = path_limits or {}
+    
+    async def __call__(self, scope: Message, receive: Callable[[], Awaitable[Message]], send: Callable[[Message], Awaitable[None]]) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        max_bytes, detail = self.path_limits.get(scope['path'], (self.max_bytes, self.detail))
+        
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            await self._reject(send, max_bytes, detail)
+            return
+        
+        received = 0
+        exceeded = False
+        response_started = False
+        
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+        
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if exceeded:
+                # Swap whatever the app answers for the 413
+                if message['type'] == 'http.response.start' and not response_started:
+                    response_started = True
+                    await self._reject(send, max_bytes, detail)
+                return
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not response_started:
+                await self._reject(send, max_bytes, detail)
+    
+    async def _reject(self, send: Callable[[Message], Awaitable[None]], max_bytes: int, detail: str) -> None:
+        """Send the 413 response."""
+        logger.warning(f"Rejected request body over {max_bytes} bytes")
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -1,11 +1,15 @@
 """
 Pydantic schemas for API request/response models
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
 
+def _is_none(value: Any) -> bool:
+    return value is None
+
+
 # ============ Slide 1: Your WhatsApp Year ============
 class Slide1Data(BaseModel):
     """Basic statistics about the chat"""
@@ -130,6 +134,10 @@ class MonthlySentiment(BaseModel):
     score: float  # -1 to 1
     label: str  # "Positive", "Neutral", "Negative"
     message_count: int
+    # Approximate mode only: messages scored and 95% interval of the score
+    sample_size: Optional[int] = Field(default=None, exclude_if=_is_none)
+    score_low: Optional[float] = Field(default=None, exclude_if=_is_none)
+    score_high: Optional[float] = Field(default=None, exclude_if=_is_none)
 
 
 class Slide8Data(BaseModel):
@@ -139,6 +147,7 @@ class Slide8Data(BaseModel):
     most_intense_month: str
     average_sentiment: float
     disclaimer: str
+    sample_size: Optional[int] = Field(default=None, exclude_if=_is_none)  # approximate mode only
 
 
 # ============ Slide 9: What You Talked About ============
@@ -154,6 +163,7 @@ class Slide9Data(BaseModel):
     """Topic modeling results"""
     topics: List[Topic]
     methodology: str
+    sample_size: Optional[int] = Field(default=None, exclude_if=_is_none)  # approximate mode only
 
 
 # ============ Slide 10: Final Summary ============
@@ -172,17 +182,17 @@ class Slide10Data(BaseModel):
 
 # ============ Combined Response ============
 class WrappedData(BaseModel):
-    """Complete wrapped data for all slides"""
-    slide1: Slide1Data
-    slide2: Slide2Data
-    slide3: Slide3Data
-    slide4: Slide4Data
-    slide5: Slide5Data
-    slide6: Slide6Data
-    slide7: Slide7Data
-    slide8: Slide8Data
-    slide9: Slide9Data
-    slide10: Slide10Data
+    """Wrapped data for all slides; slides that were not requested are omitted"""
+    slide1: Optional[Slide1Data] = Field(default=None, exclude_if=_is_none)
+    slide2: Optional[Slide2Data] = Field(default=None, exclude_if=_is_none)
+    slide3: Optional[Slide3Data] = Field(default=None, exclude_if=_is_none)
+    slide4: Optional[Slide4Data] = Field(default=None, exclude_if=_is_none)
+    slide5: Optional[Slide5Data] = Field(default=None, exclude_if=_is_none)
+    slide6: Optional[Slide6Data] = Field(default=None, exclude_if=_is_none)
+    slide7: Optional[Slide7Data] = Field(default=None, exclude_if=_is_none)
+    slide8: Optional[Slide8Data] = Field(default=None, exclude_if=_is_none)
+    slide9: Optional[Slide9Data] = Field(default=None, exclude_if=_is_none)
+    slide10: Optional[Slide10Data] = Field(default=None, exclude_if=_is_none)
 
 
 class UploadResponse(BaseModel):
@@ -193,6 +203,68 @@ class UploadResponse(BaseModel):
     data: Optional[WrappedData] = None
 
 
+class SlideResponse(BaseModel):
+    """A single slide of a session"""
+    session_id: str
+    slide: str  # "slide1" ... "slide10"
+    data: Dict[str, Any]
+
+
+# ============ Batch Upload ============
+class BatchChatResult(BaseModel):
+    """Outcome for one chat of a batch upload"""
+    filename: str
+    success: bool
+    message: str
+    session_id: Optional[str] = None
+    data: Optional[WrappedData] = None
+
+
+class PersonShare(BaseModel):
+    """A person's messages across all chats of a batch"""
+    name: str
+    messages: int
+    percentage: float  # of all messages in the batch
+    chats: int  # chats they wrote in
+
+
+class BatchRollup(BaseModel):
+    """Totals across the chats of a batch that were analyzed"""
+    total_chats: int
+    total_messages: int
+    most_active_chat: Optional[str]
+    most_active_chat_messages: int
+    people: List[PersonShare]
+
+
+class BatchUploadResponse(BaseModel):
+    """Response after a batch upload"""
+    success: bool
+    message: str
+    chats: List[BatchChatResult]
+    rollup: BatchRollup
+
+
+# ============ Background Jobs ============
+class JobResponse(BaseModel):
+    """State of a background analysis job"""
+    job_id: str
+    status: str  # "queued", "parsing", "analyzing", "completed" or "failed"
+    progress: Dict[str, str]  # {"parse": "done", "slide1": "pending", ...}
+    queue_depth: int  # jobs waiting for a worker
+    message: Optional[str] = None
+    data: Optional[WrappedData] = None
+
+
+class JobQueueStats(BaseModel):
+    """Load of the background job pool"""
+    queued: int
+    running: int
+    workers: int
+    queue_limit: int
+    accepting: bool
+
+
 class ErrorResponse(BaseModel):
     """Error response"""
     success: bool = False
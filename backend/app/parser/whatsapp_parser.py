@@ -2,14 +2,27 @@
 WhatsApp Chat Parser
 Parses WhatsApp exported .txt files into structured DataFrames
 """
-import regex as re
+import codecs
+import importlib.util
+import os
+import time
+import re
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
 from datetime import datetime
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Dict, Optional, Iterable, Iterator, Union, BinaryIO
 import logging
 
+from ..resources import resources
+
 logger = logging.getLogger(__name__)
 
+# Arrow-backed strings are used for message text when pyarrow is installed
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
 
 class WhatsAppParser:
     """
@@ -31,6 +44,17 @@ class WhatsAppParser:
         r'^(\d{1,2}\.\d{1,2}\.\d{2,4}),?\s+(\d{1,2}:\d{2}(?::\d{2})?(?:\s*[APap][Mm])?)\s*[-–]\s*([^:]+):\s*(.*)$',
     ]
     
+    # All PATTERNS as one expression, matched against a whole block of lines
+    # in MULTILINE mode; whitespace and sender classes exclude '\n' so that a
+    # match never runs past the end of its line
+    HEADER_PATTERN = (
+        r'^(?:(?P<date>\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}\.\d{1,2}\.\d{2,4}),?[^\S\n]+'
+        r'(?P<time>\d{1,2}:\d{2}(?::\d{2})?(?:[^\S\n]*[APap][Mm])?)[^\S\n]*[-–]'
+        r'|\[(?P<bracket_date>\d{1,2}/\d{1,2}/\d{2,4}),?[^\S\n]+'
+        r'(?P<bracket_time>\d{1,2}:\d{2}(?::\d{2})?(?:[^\S\n]*[APap][Mm])?)\])'
+        r'[^\S\n]*(?P<sender>[^:\n]+):[^\S\n]*(?P<message>.*)$'
+    )
+    
     # System message indicators
     SYSTEM_INDICATORS = [
         'Messages and calls are end-to-end encrypted',
@@ -60,10 +84,65 @@ class WhatsAppParser:
         'location': [r'location:', r'live location shared'],
     }
     
-    def __init__(self):
-        self.compiled_patterns = [re.compile(p, re.MULTILINE) for p in self.PATTERNS]
+    # Message types in classification priority order; a message gets the
+    # first type any of whose patterns it contains, 'text' otherwise
+    MESSAGE_TYPES = ['system', *MEDIA_PATTERNS, 'text']
+    
+    # Category labels for the compact day_of_week and month columns
+    DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    MONTH_NAMES = [
+        'January', 'February', 'March', 'April', 'May', 'June',
+        'July', 'August', 'September', 'October', 'November', 'December',
+    ]
+    
+    # Handle various date formats
+    DATE_FORMATS = [
+        '%d/%m/%y', '%d/%m/%Y',
+        '%m/%d/%y', '%m/%d/%Y',
+    ]
+    
+    # Handle various time formats
+    TIME_FORMATS = [
+        '%H:%M', '%H:%M:%S',
+        '%I:%M %p', '%I:%M:%S %p',
+        '%I:%M%p', '%I:%M:%S%p',
+    ]
+    
+    # Streaming mode: bytes read per chunk and messages per column batch
+    STREAM_CHUNK_SIZE = 64 * 1024
+    STREAM_BATCH_SIZE = 50000
+    
+    def __init__(
+        self,
+        compact: bool = False,
+        max_messages: Optional[int] = None,
+        overflow: str = 'truncate'
+    ):
+        """
+        Args:
+            compact: Build the frame with categorical, narrow-integer and
+                     period columns instead of Python objects, and no ``time``
+            max_messages: Keep at most this many messages
+            overflow: What to keep of a longer chat: 'truncate' stops at the
+                      first ``max_messages`` messages without reading further,
+                      'sample' keeps that many evenly spaced over the whole chat
+        """
+        if overflow not in ('truncate', 'sample'):
+            raise ValueError(f"Unknown overflow policy {overflow!r}")
+        self.compact = compact
+        self.max_messages = max_messages
+        self.overflow = overflow
+        patterns = resources.get('parser_patterns')
+        self.header_pattern = patterns['header']
         self.df = None
         self.chat_name = "WhatsApp Chat"
+        self.line_count = 0  # non-empty lines read from a binary source
+        self.datetime_format = None
+        self.datetime_values = None  # distinct raw date/time strings the format was sniffed from
+        self._stream_datetime_values: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None  # per batch, while streaming
+        self.timings: Dict[str, float] = {}  # seconds spent per parse stage
+        self.total_messages = 0  # messages seen, before max_messages applied (truncation stops counting)
+        self.message_type_pattern = patterns['message_type']
         
     def parse(self, content: str) -> pd.DataFrame:
         """
@@ -75,105 +154,587 @@ class WhatsAppParser:
         Returns:
             DataFrame with columns: datetime, date, time, hour, day_of_week, 
                                    month, sender, message, message_type
+                                   (no time in compact mode).
+            The sniffed datetime format is reported in ``df.attrs['datetime_format']``.
+        """
+        self.datetime_format = None
+        self.timings = {}
+        # A BOM left on by decoding with 'utf-8' would hide the first header
+        content = content.removeprefix('\ufeff')
+        with self._timed('extract'):
+            messages, _ = self._extract_frame(content)
+        
+        if messages.empty:
+            raise ValueError("No valid messages found in the chat export")
+        
+        frames = self._limit_frames([self._build_frame(messages)])
+        with self._timed('finalize'):
+            self.df = self._finalize_frame(frames[0])
+        self.df.attrs['datetime_format'] = self.datetime_format
+        
+        logger.info(f"Parsed {len(self.df)} messages from {self.df['sender'].nunique()} participants")
+        logger.debug(f"Parse timings: {self._format_timings()}")
+        
+        return self.df
+    
+    def parse_stream(
+        self,
+        source: Union[BinaryIO, Iterable[bytes], bytes],
+        batch_size: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Parse a WhatsApp export incrementally without holding it as one string.
+        
+        Lines are processed in batches of at most ``batch_size``; each batch
+        is extracted in bulk and turned into a frame (with its system messages
+        dropped) before the next one is read. A message that runs past the end
+        of a batch is carried over to the next one.
+        
+        The datetime format is sniffed from the first batch so batches can be
+        converted as they arrive. Once all are read it is sniffed again from
+        the values of every batch, as ``parse`` does; if that disagrees, the
+        messages read so far are converted again from their raw timestamps,
+        so the result is the same as ``parse`` on the decoded text.
+        
+        With ``max_messages`` and the 'truncate' policy, reading stops once
+        enough messages are parsed; with 'sample', at most twice that many are
+        held at any time.
+        
+        Args:
+            source: Binary file-like object, iterable of byte chunks or bytes
+            batch_size: Maximum number of lines per batch
+            
+        Returns:
+            DataFrame with the same columns as ``parse``
+        """
+        batch_size = batch_size or self.STREAM_BATCH_SIZE
+        self.datetime_format = None
+        self.timings = {}
+        self._stream_datetime_values = []
+        try:
+            frames = self._limit_frames(
+                self._build_frame(messages)
+                for messages in self._iter_message_frames(self._iter_lines(source), batch_size)
+            )
+            
+            if not frames:
+                raise ValueError("No valid messages found in the chat export")
+            
+            df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            df = self._reconvert_datetimes(df, self._stream_datetime_values)
+        finally:
+            self._stream_datetime_values = None
+        
+        with self._timed('finalize'):
+            self.df = self._finalize_frame(df)
+        self.df.attrs['datetime_format'] = self.datetime_format
+        
+        logger.info(f"Parsed {len(self.df)} messages from {self.df['sender'].nunique()} participants")
+        logger.debug(f"Parse timings: {self._format_timings()}")
+        
+        return self.df
+    
+    def parse_parallel(self, content: Union[bytes, str], workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Parse a large export on several processes.
+        
+        The raw bytes are cut into one range per worker, each split point
+        moved forward to the next line that opens a message, so no message is
+        cut in two. The ranges are parsed in a ``ProcessPoolExecutor`` and
+        their frames concatenated in order. Every range sniffs its own
+        datetime format; ranges that disagree with the format sniffed from the
+        values of all of them are parsed again with it, so the result is the
+        same as ``parse`` on the decoded text.
+        
+        Args:
+            content: Raw export, as bytes or already decoded text
+            workers: Number of processes (default: one per CPU)
+            
+        Returns:
+            DataFrame with the same columns as ``parse``
         """
-        messages = self._extract_messages(content)
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        workers = workers or os.cpu_count() or 1
+        self.datetime_format = None
+        self.timings = {}
+        
+        with self._timed('split'):
+            ranges = self._split_ranges(content, workers)
         
-        if not messages:
+        with self._timed('parallel'):
+            # Forking while the warm-up thread holds an import lock would
+            # leave the workers deadlocked on it
+            resources.wait_for_warm_up()
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                results = list(pool.map(_parse_range, ranges, repeat(self.compact)))
+                # Set before any error, so callers can tell junk from an empty file
+                self.line_count = sum(line_count for _, _, _, line_count in results)
+                
+                sniffed = [values for _, _, values, _ in results if values is not None]
+                if not sniffed:
+                    raise ValueError("No valid messages found in the chat export")
+                date_values = pd.unique(np.concatenate([dates for dates, _ in sniffed]))
+                time_values = pd.unique(np.concatenate([times for _, times in sniffed]))
+                self.datetime_format = self._sniff_datetime_format(
+                    *self._normalize_datetime_values(date_values, time_values)
+                )
+                self.datetime_values = (date_values, time_values)
+                
+                redo = [i for i, (_, datetime_format, _, _) in enumerate(results)
+                        if datetime_format not in (None, self.datetime_format)]
+                if redo:
+                    logger.info(f"Re-parsing {len(redo)} of {len(ranges)} ranges with {self.datetime_format!r}")
+                    rerun = pool.map(
+                        _parse_range,
+                        [ranges[i] for i in redo],
+                        repeat(self.compact),
+                        repeat(self.datetime_format)
+                    )
+                    for i, result in zip(redo, rerun):
+                        results[i] = result
+        
+        frames = self._limit_frames(frame for frame, _, _, _ in results if frame is not None)
+        if not frames:
             raise ValueError("No valid messages found in the chat export")
         
-        # Create DataFrame
-        self.df = pd.DataFrame(messages, columns=['datetime', 'sender', 'message'])
+        with self._timed('finalize'):
+            self.df = self._finalize_frame(
+                frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+            )
+        self.df.attrs['datetime_format'] = self.datetime_format
+        
+        logger.info(
+            f"Parsed {len(self.df)} messages from {self.df['sender'].nunique()} participants "
+            f"in {len(ranges)} ranges"
+        )
+        logger.debug(f"Parse timings: {self._format_timings()}")
+        
+        return self.df
+    
+    def iter_messages(
+        self,
+        source: Union[BinaryIO, Iterable[bytes], bytes]
+    ) -> Iterator[Tuple[pd.Timestamp, str, str]]:
+        """
+        Yield (datetime, sender, message) tuples from a binary source as they
+        are parsed, a batch of lines at a time.
         
+        Unlike ``parse_stream``, messages are gone by the time a later batch
+        could change the datetime format, so it is sniffed from the first one.
+        """
+        self.datetime_format = None
+        self.timings = {}
+        for messages in self._iter_message_frames(self._iter_lines(source), self.STREAM_BATCH_SIZE):
+            yield from messages.itertuples(index=False, name=None)
+    
+    def _limit_frames(self, frames: Iterable[pd.DataFrame]) -> List[pd.DataFrame]:
+        """
+        Collect built frames in order, applying ``max_messages``.
+        
+        'truncate' stops consuming ``frames`` as soon as the limit is reached.
+        'sample' thins the rows kept so far to every second, fourth, ...
+        message of the chat whenever they exceed twice the limit, then picks
+        ``max_messages`` evenly spaced ones at the end.
+        """
+        self.total_messages = 0
+        if not self.max_messages:
+            kept = list(frames)
+            self.total_messages = sum(len(frame) for frame in kept)
+            return kept
+        
+        kept: List[pd.DataFrame] = []
+        if self.overflow == 'truncate':
+            for frame in frames:
+                remaining = self.max_messages - self.total_messages
+                kept.append(frame.iloc[:remaining])
+                self.total_messages += len(frame)
+                if self.total_messages >= self.max_messages:
+                    logger.warning(f"Stopped parsing at {self.max_messages} messages")
+                    break
+            return kept
+        
+        stride = 1
+        n_kept = 0
+        positions: List[np.ndarray] = []  # position in the chat of each kept row
+        for frame in frames:
+            position = np.arange(self.total_messages, self.total_messages + len(frame))
+            self.total_messages += len(frame)
+            keep = position % stride == 0
+            kept.append(frame[keep])
+            positions.append(position[keep])
+            n_kept += int(keep.sum())
+            while n_kept > 2 * self.max_messages:
+                stride *= 2
+                masks = [position % stride == 0 for position in positions]
+                kept = [kept_frame[mask] for kept_frame, mask in zip(kept, masks)]
+                positions = [position[mask] for position, mask in zip(positions, masks)]
+                n_kept = sum(len(position) for position in positions)
+        
+        if not kept:
+            return kept
+        df = pd.concat(kept, ignore_index=True)
+        if n_kept > self.max_messages:
+            rows = np.linspace(0, n_kept - 1, self.max_messages).round().astype(np.int64)
+            df = df.iloc[rows].reset_index(drop=True)
+            logger.warning(f"Sampled {self.max_messages} of {self.total_messages} messages")
+        return [df]
+    
+    def _build_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add derived columns to extracted messages and drop system messages."""        
         # Extract temporal features
-        self.df['date'] = self.df['datetime'].dt.date
-        self.df['time'] = self.df['datetime'].dt.time
-        self.df['hour'] = self.df['datetime'].dt.hour
-        self.df['day_of_week'] = self.df['datetime'].dt.day_name()
-        self.df['month'] = self.df['datetime'].dt.month_name()
-        self.df['year'] = self.df['datetime'].dt.year
+        with self._timed('temporal'):
+            self._add_temporal_columns(df)
         
-        # Classify message types
-        self.df['message_type'] = self.df['message'].apply(self._classify_message)
+        # Classify message types; the analyzers reuse the lowercased text
+        with self._timed('classify'):
+            lowered = df['message'].str.lower()
+            df['message_type'] = self._classify_messages(df['message'], lowered)
+            if self.compact:
+                df['text_lower'] = lowered
         
         # Extract word count for text messages
-        self.df['word_count'] = self.df.apply(
-            lambda row: len(row['message'].split()) if row['message_type'] == 'text' else 0,
-            axis=1
-        )
+        with self._timed('word_count'):
+            df['word_count'] = self._count_words(df['message'], df['message_type'] == 'text')
         
         # Filter out system messages
-        self.df = self.df[self.df['message_type'] != 'system'].reset_index(drop=True)
+        with self._timed('filter'):
+            return df[df['message_type'] != 'system'].reset_index(drop=True)
+    
+    def _add_temporal_columns(self, df: pd.DataFrame) -> None:
+        """Derive date, hour, weekday, month and year columns from ``datetime``."""
+        if self.compact:
+            df['date'] = df['datetime'].dt.to_period('D')
+            df['hour'] = df['datetime'].dt.hour.astype(np.int8)
+            df['day_of_week'] = pd.Categorical.from_codes(df['datetime'].dt.dayofweek, self.DAY_NAMES)
+            df['month'] = pd.Categorical.from_codes(df['datetime'].dt.month - 1, self.MONTH_NAMES)
+            df['year'] = df['datetime'].dt.year.astype(np.int16)
+        else:
+            df['date'] = df['datetime'].dt.date
+            df['time'] = df['datetime'].dt.time
+            df['hour'] = df['datetime'].dt.hour
+            df['day_of_week'] = df['datetime'].dt.day_name()
+            df['month'] = df['datetime'].dt.month_name()
+            df['year'] = df['datetime'].dt.year
+    
+    def _reconvert_datetimes(
+        self,
+        df: pd.DataFrame,
+        batch_values: List[Tuple[np.ndarray, np.ndarray]]
+    ) -> pd.DataFrame:
+        """
+        Sniff the datetime format again from the distinct values of every
+        batch and, if it differs from the one the batches were converted
+        with, convert the messages again from their raw date/time strings.
         
-        logger.info(f"Parsed {len(self.df)} messages from {self.df['sender'].nunique()} participants")
+        Whether a timestamp parses at all does not depend on the format (the
+        fallback tries every known one), so message boundaries stay the same
+        and only the datetimes and the columns derived from them change.
+        """
+        if len(batch_values) > 1:
+            date_values = pd.unique(np.concatenate([dates for dates, _ in batch_values]))
+            time_values = pd.unique(np.concatenate([times for _, times in batch_values]))
+            datetime_format = self._sniff_datetime_format(
+                *self._normalize_datetime_values(date_values, time_values)
+            )
+            self.datetime_values = (date_values, time_values)
+            if datetime_format != self.datetime_format:
+                logger.info(f"Re-converting datetimes with {datetime_format!r} instead of {self.datetime_format!r}")
+                self.datetime_format = datetime_format
+                with self._timed('datetime'):
+                    df['datetime'] = self._convert_datetimes(df['date_str'], df['time_str']).to_numpy()
+                with self._timed('temporal'):
+                    self._add_temporal_columns(df)
+        return df.drop(columns=['date_str', 'time_str'])
+    
+    def _count_words(self, messages: pd.Series, mask: pd.Series) -> np.ndarray:
+        """Count whitespace-separated words of the masked messages; others get 0."""
+        word_count = np.zeros(len(messages), dtype=np.int32)
+        selected = mask.to_numpy()
+        word_count[selected] = [len(message.split()) for message in messages.to_numpy()[selected]]
+        return word_count
+    
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        """Add the wall time of the enclosed block to ``self.timings[stage]``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+    
+    def _format_timings(self) -> str:
+        """Render ``self.timings`` as 'stage=milliseconds' pairs for logging."""
+        return ', '.join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.timings.items())
+    
+    def _finalize_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Tidy up categoricals once all batches of a frame are combined."""
+        df['message_type'] = df['message_type'].cat.remove_unused_categories()
         
-        return self.df
+        if self.compact:
+            # Sorted categories keep groupby order the same as for plain strings
+            df['sender'] = df['sender'].astype('category')
+            # Categories in order of first appearance keep value_counts ties the same
+            for column in ('day_of_week', 'month'):
+                used = df[column].cat.remove_unused_categories()
+                df[column] = used.cat.reorder_categories(used.unique().tolist())
+            if HAS_PYARROW:
+                df['message'] = df['message'].astype('string[pyarrow]')
+                df['text_lower'] = df['text_lower'].astype('string[pyarrow]')
+        
+        return df
     
-    def _extract_messages(self, content: str) -> List[Tuple[datetime, str, str]]:
-        """Extract messages using regex patterns."""
-        messages = []
-        lines = content.split('\n')
+    def _extract_frame(self, text: str, complete: bool = True) -> Tuple[pd.DataFrame, str]:
+        """
+        Extract messages from a block of text in bulk.
+        
+        The block is split on header lines by a single MULTILINE scan of the
+        combined pattern, which leaves the text between consecutive headers -
+        the continuation lines of the earlier one - as its own piece. With
+        ``complete=False`` the last message may continue in the next block, so
+        it is left out and its text is returned for the caller to carry over.
+        
+        Returns:
+            (DataFrame with datetime, sender and message columns,
+             text that was not consumed)
+        """
+        # [preamble, header, date, time, bracket_date, bracket_time, sender, message, tail, header, ...]
+        parts = self.header_pattern.split(text)
+        headers = parts[1::8]
+        if not headers:
+            return pd.DataFrame(columns=['datetime', 'sender', 'message']), ''
+        senders, messages, tails = parts[6::8], parts[7::8], parts[8::8]
+        
+        # Lines whose timestamp cannot be parsed count as continuations
+        date_strs = pd.Series(parts[2::8], dtype=object).fillna(pd.Series(parts[4::8], dtype=object))
+        time_strs = pd.Series(parts[3::8], dtype=object).fillna(pd.Series(parts[5::8], dtype=object))
+        with self._timed('datetime'):
+            datetimes = self._convert_datetimes(date_strs, time_strs).to_numpy()
+        is_valid = pd.notna(datetimes)
+        if not is_valid.all():
+            positions = np.arange(len(headers))
+            owners = np.maximum.accumulate(np.where(is_valid, positions, -1))
+            for i in positions[~is_valid]:
+                if owners[i] >= 0:
+                    tails[owners[i]] += headers[i] + tails[i]
+        valid = np.flatnonzero(is_valid)
+        
+        rest = ''
+        if not complete and len(valid):
+            last = valid[-1]
+            rest = headers[last] + tails[last]
+            valid = valid[:-1]
+        if not len(valid):
+            return pd.DataFrame(columns=['datetime', 'sender', 'message']), rest
         
-        current_message = None
+        # While streaming, the raw timestamps stay with the messages in case
+        # a later batch changes the sniffed format
+        raw = {}
+        if self._stream_datetime_values is not None:
+            raw = {'date_str': date_strs.to_numpy()[valid], 'time_str': time_strs.to_numpy()[valid]}
+        
+        # Attach the non-empty lines between a header and the next one
+        messages = [messages[i].strip() for i in valid]
+        for j, i in enumerate(valid):
+            tail = tails[i]
+            if len(tail) > 1 and not tail.isspace():
+                lines = [line.strip() for line in tail.split('\n')]
+                messages[j] = '\n'.join([messages[j], *filter(None, lines)])
+        
+        return pd.DataFrame({
+            'datetime': datetimes[valid],
+            'sender': [senders[i].strip() for i in valid],
+            'message': messages,
+            **raw,
+        }), rest
+    
+    def _split_ranges(self, content: bytes, parts: int) -> List[bytes]:
+        """Cut raw export bytes into up to ``parts`` ranges that each start on a message."""
+        bounds = [0]
+        for i in range(1, parts):
+            boundary = self._next_message_start(content, max(len(content) * i // parts, bounds[-1]))
+            if boundary >= len(content):
+                break
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+        bounds.append(len(content))
+        
+        return [content[start:end] for start, end in zip(bounds, bounds[1:])]
+    
+    def _next_message_start(self, content: bytes, offset: int) -> int:
+        """
+        Find the first line after ``offset`` that opens a message.
+        
+        A header line only opens a message if its timestamp parses; one that
+        does not is a continuation of the previous message and cannot start
+        a range.
+        """
+        while True:
+            newline = content.find(b'\n', offset)
+            if newline == -1:
+                return len(content)
+            offset = newline + 1
+            
+            end = content.find(b'\n', offset)
+            line = content[offset:end if end != -1 else len(content)].decode('utf-8', errors='ignore')
+            match = self.header_pattern.match(line)
+            if match and self._parse_datetime(
+                match['date'] or match['bracket_date'],
+                match['time'] or match['bracket_time']
+            ):
+                return offset
+    
+    def _iter_message_frames(self, lines: Iterable[str], batch_size: int) -> Iterator[pd.DataFrame]:
+        """Extract messages batch by batch, carrying unfinished messages forward."""
+        carry = ''
+        
+        for batch in self._iter_line_batches(lines, batch_size):
+            text = '\n'.join([carry, *batch]) if carry else '\n'.join(batch)
+            with self._timed('extract'):
+                messages, carry = self._extract_frame(text, complete=False)
+            if len(messages):
+                yield messages
+        
+        if carry:
+            with self._timed('extract'):
+                messages, _ = self._extract_frame(carry)
+            if len(messages):
+                yield messages
+    
+    def _iter_line_batches(
+        self,
+        lines: Iterable[str],
+        batch_size: Optional[int] = None
+    ) -> Iterator[List[str]]:
+        """Yield non-empty lines in lists of at most batch_size (unbounded if None)."""
+        self.line_count = 0
+        batch: List[str] = []
         
         for line in lines:
             # Skip empty lines
             if not line.strip():
                 continue
-                
-            # Try to match message patterns
-            matched = False
-            for pattern in self.compiled_patterns:
-                match = pattern.match(line)
-                if match:
-                    # Save previous message if exists
-                    if current_message:
-                        messages.append(current_message)
-                    
-                    date_str, time_str, sender, message = match.groups()
-                    
-                    # Parse datetime
-                    dt = self._parse_datetime(date_str, time_str)
-                    if dt:
-                        current_message = (dt, sender.strip(), message.strip())
-                        matched = True
-                        break
+            self.line_count += 1
             
-            # If no match, it's a continuation of the previous message
-            if not matched and current_message:
-                dt, sender, prev_message = current_message
-                current_message = (dt, sender, prev_message + '\n' + line.strip())
+            batch.append(line)
+            if batch_size and len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
+    
+    def _convert_datetimes(self, date_strs: pd.Series, time_strs: pd.Series) -> pd.Series:
+        """
+        Convert captured date/time strings in bulk.
+        
+        The format is sniffed once per export; dates and times are then each
+        parsed once per distinct value and recombined. Only lines that do not
+        fit the sniffed format fall back to trying every known format, and
+        lines that cannot be parsed at all come back as NaT.
+        """
+        if date_strs.empty:
+            return pd.Series(pd.NaT, index=date_strs.index, dtype='datetime64[ns]')
+        
+        date_codes, date_values = pd.factorize(date_strs)
+        time_codes, time_values = pd.factorize(time_strs)
+        dates, times = self._normalize_datetime_values(date_values, time_values)
+        
+        if self.datetime_format is None:
+            self.datetime_format = self._sniff_datetime_format(dates, times)
+            self.datetime_values = (date_values, time_values)
+        if self._stream_datetime_values is not None:
+            self._stream_datetime_values.append((np.asarray(date_values, dtype=object), np.asarray(time_values, dtype=object)))
+        
+        # Times have their spaces stripped, so %p directly follows the minutes
+        # (matching is case-insensitive, as with the uppercased _normalize_time)
+        date_fmt, time_fmt = self.datetime_format.replace(' %p', '%p').split(' ')
+        days = pd.to_datetime(dates, format=date_fmt, errors='coerce').to_numpy()
+        offsets = (pd.to_datetime(times, format=time_fmt, errors='coerce') - pd.Timestamp(1900, 1, 1)).to_numpy()
+        parsed = pd.Series(days[date_codes] + offsets[time_codes], index=date_strs.index)
+        
+        failed = parsed.isna()
+        if failed.any():
+            fallback = pd.Series([
+                self._parse_datetime(date_str, time_str)
+                for date_str, time_str in zip(date_strs[failed], time_strs[failed])
+            ], index=parsed.index[failed], dtype=object)
+            parsed = parsed.where(~failed, pd.to_datetime(fallback))
+        
+        return parsed
+    
+    def _normalize_datetime_values(
+        self,
+        date_values: np.ndarray,
+        time_values: np.ndarray
+    ) -> Tuple[pd.Series, pd.Series]:
+        """Normalize distinct date strings to '/' separators and strip spaces from times."""
+        dates = pd.Series(date_values, dtype=object).str.replace('.', '/', regex=False)
+        times = pd.Series(time_values, dtype=object).str.replace(' ', '', regex=False)
+        return dates, times
+    
+    def _sniff_datetime_format(self, dates: pd.Series, times: pd.Series) -> str:
+        """Pick the strptime format of an export from its distinct normalized date/time strings."""
+        parts = dates.str.split('/', expand=True)
+        first = pd.to_numeric(parts[0], errors='coerce')
+        second = pd.to_numeric(parts[1], errors='coerce')
+        
+        # DD/MM unless only the second field ever exceeds 12
+        day_first = (first > 12).any() or not (second > 12).any()
+        long_year = (parts[2].str.len() == 4).mean() >= 0.5
+        twelve_hour = times.str.upper().str.endswith('M').mean() >= 0.5
+        with_seconds = (times.str.count(':') == 2).mean() >= 0.5
         
-        # Don't forget the last message
-        if current_message:
-            messages.append(current_message)
+        date_fmt = ('%d/%m/' if day_first else '%m/%d/') + ('%Y' if long_year else '%y')
+        time_fmt = ('%I:%M' if twelve_hour else '%H:%M') + (':%S' if with_seconds else '')
+        if twelve_hour:
+            time_fmt += ' %p'
         
-        return messages
+        return f"{date_fmt} {time_fmt}"
+    
+    def _iter_lines(self, source: Union[BinaryIO, Iterable[bytes], bytes]) -> Iterator[str]:
+        """Incrementally decode a binary source and yield its lines, without a leading BOM."""
+        decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='ignore')
+        pending: List[str] = []
+        
+        for chunk in self._iter_chunks(source):
+            with self._timed('decode'):
+                text = decoder.decode(chunk)
+            if '\n' not in text:
+                pending.append(text)
+                continue
+            
+            lines = text.split('\n')
+            pending.append(lines[0])
+            yield ''.join(pending)
+            yield from lines[1:-1]
+            pending = [lines[-1]]
+        
+        pending.append(decoder.decode(b'', final=True))
+        yield from ''.join(pending).split('\n')
+    
+    def _iter_chunks(self, source: Union[BinaryIO, Iterable[bytes], bytes]) -> Iterator[bytes]:
+        """Yield byte chunks from a file-like object, chunk iterable or bytes."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            yield bytes(source)
+        elif hasattr(source, 'read'):
+            while True:
+                with self._timed('read'):
+                    chunk = source.read(self.STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            yield from source
     
     def _parse_datetime(self, date_str: str, time_str: str) -> Optional[datetime]:
         """Parse date and time strings into datetime object."""
         # Normalize separators
         date_str = date_str.replace('.', '/')
+        time_str = self._normalize_time(time_str)
         
-        # Handle various date formats
-        date_formats = [
-            '%d/%m/%y', '%d/%m/%Y',
-            '%m/%d/%y', '%m/%d/%Y',
-        ]
-        
-        # Handle various time formats
-        time_formats = [
-            '%H:%M', '%H:%M:%S',
-            '%I:%M %p', '%I:%M:%S %p',
-            '%I:%M%p', '%I:%M:%S%p',
-        ]
-        
-        time_str = time_str.strip().upper().replace(' ', '')
-        if 'AM' in time_str or 'PM' in time_str:
-            # Ensure space before AM/PM
-            time_str = time_str.replace('AM', ' AM').replace('PM', ' PM').strip()
-        
-        for date_fmt in date_formats:
-            for time_fmt in time_formats:
+        for date_fmt in self.DATE_FORMATS:
+            for time_fmt in self.TIME_FORMATS:
                 try:
                     dt_str = f"{date_str} {time_str}"
                     fmt = f"{date_fmt} {time_fmt}"
@@ -184,22 +745,64 @@ class WhatsAppParser:
         logger.warning(f"Could not parse datetime: {date_str} {time_str}")
         return None
     
-    def _classify_message(self, message: str) -> str:
-        """Classify message type based on content."""
-        message_lower = message.lower()
+    def _normalize_time(self, time_str: str) -> str:
+        """Normalize a time string to 'HH:MM[:SS][ AM|PM]'."""
+        time_str = time_str.strip().upper().replace(' ', '')
+        if 'AM' in time_str or 'PM' in time_str:
+            # Ensure space before AM/PM
+            time_str = time_str.replace('AM', ' AM').replace('PM', ' PM').strip()
+        return time_str
+    
+    @classmethod
+    def _compile_message_type_pattern(cls) -> re.Pattern:
+        """
+        Combine the system indicators and media patterns into one matcher.
         
-        # Check for system messages
-        for indicator in self.SYSTEM_INDICATORS:
-            if indicator.lower() in message_lower:
-                return 'system'
+        Each message type is a named group, in ``MESSAGE_TYPES`` priority
+        order, inside a lookahead so that a scan reports every position where
+        any pattern starts. Patterns are lowercased and matched against
+        lowercased text; the leading character class lets the scanner skip
+        positions where no pattern can start.
+        """
+        groups = [('system', [re.escape(indicator) for indicator in cls.SYSTEM_INDICATORS])]
+        groups += cls.MEDIA_PATTERNS.items()
         
-        # Check for media types
-        for media_type, patterns in self.MEDIA_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, message, re.IGNORECASE):
-                    return media_type
+        alternatives = []
+        first_chars = set()
+        for message_type, patterns in groups:
+            patterns = [pattern.lower() for pattern in patterns]
+            alternatives.append(f"(?P<{message_type}>{'|'.join(patterns)})")
+            first_chars.update(pattern[:2] if pattern.startswith('\\') else re.escape(pattern[0])
+                               for pattern in patterns)
         
-        return 'text'
+        return re.compile(f"(?=[{''.join(sorted(first_chars))}])(?=(?:{'|'.join(alternatives)}))")
+    
+    def _classify_messages(self, messages: pd.Series, lowered: Optional[pd.Series] = None) -> pd.Series:
+        """
+        Classify message types based on content, as a categorical Series.
+        
+        The whole column is scanned once as a single newline-joined string
+        (no pattern can span a newline); each match is mapped back to its
+        message by offset, and a message keeps the highest-priority type
+        found in it. ``lowered`` may pass the messages already lowercased.
+        """
+        lowered = [message.lower() for message in messages] if lowered is None else lowered.tolist()
+        codes = np.full(len(lowered), len(self.MESSAGE_TYPES) - 1, dtype=np.int8)
+        
+        found = [(match.start(), match.lastgroup)
+                 for match in self.message_type_pattern.finditer('\n'.join(lowered))]
+        if found:
+            sizes = np.fromiter(map(len, lowered), dtype=np.int64, count=len(lowered)) + 1
+            offsets = np.cumsum(sizes) - sizes
+            positions, message_types = zip(*found)
+            rows = np.searchsorted(offsets, positions, side='right') - 1
+            priority = {message_type: code for code, message_type in enumerate(self.MESSAGE_TYPES)}
+            np.minimum.at(codes, rows, [priority[message_type] for message_type in message_types])
+        
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=self.MESSAGE_TYPES),
+            index=messages.index
+        )
     
     def get_participants(self) -> List[str]:
         """Get list of unique participants."""
@@ -215,3 +818,38 @@ class WhatsAppParser:
             self.df['datetime'].min().strftime('%Y-%m-%d'),
             self.df['datetime'].max().strftime('%Y-%m-%d')
         )
+
+
+@resources.register('parser_patterns')
+def _build_parser_patterns() -> Dict[str, re.Pattern]:
+    """WhatsAppParser's compiled header and message type patterns."""
+    return {
+        # The stdlib engine scans the whole export noticeably faster than ``regex``
+        'header': re.compile(f'({WhatsAppParser.HEADER_PATTERN})', re.MULTILINE),
+        'message_type': WhatsAppParser._compile_message_type_pattern(),
+    }
+
+
+def _parse_range(
+    content: bytes,
+    compact: bool,
+    datetime_format: Optional[str] = None
+) -> Tuple[Optional[pd.DataFrame], Optional[str], Optional[Tuple[np.ndarray, np.ndarray]], int]:
+    """
+    Parse one byte range of an export in a worker process.
+    
+    Returns:
+        (frame of the range's messages or None,
+         datetime format used, distinct date/time strings it was sniffed from,
+         number of non-empty lines)
+    """
+    parser = WhatsAppParser(compact=compact)
+    parser.datetime_format = datetime_format
+    # Only the first range can start with the export's BOM
+    text = content.decode('utf-8-sig', errors='ignore')
+    line_count = sum(1 for line in text.split('\n') if line.strip())
+    
+    messages, _ = parser._extract_frame(text)
+    frame = parser._build_frame(messages) if len(messages) else None
+    
+    return frame, parser.datetime_format, parser.datetime_values, line_count
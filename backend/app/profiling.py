@@ -0,0 +1,114 @@
+"""
+Pipeline Profiling
+Deterministic (cProfile) profiles of single uploads, for debugging slow chats
+"""
+import io
+import time
+import pstats
+import cProfile
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Raw pstats data: (file, line, function) -> (calls, primitive calls, tottime, cumtime, callers)
+RawStats = Dict[Tuple[str, int, str], Tuple[Any, ...]]
+
+
+def profiled_call(func: Callable[..., Any], *args: Any) -> Tuple[Any, float, RawStats]:
+    """
+    Call ``func`` under cProfile.
+    
+    Returns:
+        (result, wall time in seconds, raw pstats data); all picklable, so
+        this also works on a worker process
+    """
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    result = profile.runcall(func, *args)
+    seconds = time.perf_counter() - start
+    return result, seconds, pstats.Stats(profile).stats
+
+
+class PipelineProfile:
+    """
+    Profile of one upload, kept per pipeline stage: parsing, features and
+    each analysis step.
+    
+    Each stage is profiled on the thread (or process) that runs it, so the
+    stages can be reported separately as well as merged into one list of
+    the hottest functions. Only raw pstats data is kept, so a profile can
+    travel back from a worker process with the parsed chat.
+    """
+    
+    def __init__(self):
+        self.stages: Dict[str, RawStats] = {}
+        self.seconds: Dict[str, float] = {}  # wall time of each stage
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Profile the enclosed block, on the current thread, as stage ``name``."""
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.add(name, pstats.Stats(profile).stats, time.perf_counter() - start)
+    
+    def add(self, name: str, stats: RawStats, seconds: float) -> None:
+        """Add a stage profiled elsewhere, e.g. with profiled_call."""
+        self.stages[name] = stats
+        self.seconds[name] = seconds
+    
+    def stats(self, names: Optional[Iterable[str]] = None, stream: Optional[io.TextIOBase] = None) -> pstats.Stats:
+        """The given stages (all by default) merged into one pstats.Stats."""
+        merged = pstats.Stats(stream=stream)
+        for name in self.stages if names is None else names:
+            merged.add(_LoadedStats(self.stages[name]))
+        return merged
+    
+    def dump(self, path: str) -> None:
+        """Write all stages as one pstats file, e.g. for snakeviz."""
+        self.stats().dump_stats(path)
+    
+    def report(self, top: int = 30, per_stage: int = 5) -> str:
+        """
+        Text report: wall time and hottest functions of each stage, slowest
+        stage first, then the hottest functions overall by own time and by
+        cumulative time.
+        """
+        out = io.StringIO()
+        out.write("Stages (wall time; hottest functions by own time)\n")
+        for name in sorted(self.stages, key=lambda name: -self.seconds[name]):
+            out.write(f"\n{name}: {self.seconds[name] * 1000:.1f}ms\n")
+            for (filename, line, function), (_, calls, tottime, cumtime, _) in _hottest(self.stages[name], per_stage):
+                out.write(f"    {tottime * 1000:9.1f}ms own {cumtime * 1000:9.1f}ms cum {calls:>9}  "
+                          f"{function} ({_short_path(filename)}:{line})\n")
+        
+        for sort in ('tottime', 'cumulative'):
+            out.write(f"\nAll stages, top {top} by {sort}\n")
+            self.stats(stream=out).strip_dirs().sort_stats(sort).print_stats(top)
+        return out.getvalue()
+
+
+class _LoadedStats:
+    """Raw pstats data in the shape pstats.Stats loads from a profiler."""
+    
+    def __init__(self, stats: RawStats):
+        self.stats = dict(stats)
+    
+    def create_stats(self) -> None:
+        pass
+
+
+def _hottest(stats: RawStats, count: int) -> List[Tuple[Tuple[str, int, str], Tuple[Any, ...]]]:
+    """The ``count`` functions of ``stats`` with the most own time."""
+    return sorted(stats.items(), key=lambda item: -item[1][2])[:count]
+
+
+def _short_path(filename: str) -> str:
+    """Path from the app or the installed package down, for readability."""
+    for marker in ('/app/', '/site-packages/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
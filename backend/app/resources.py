@@ -0,0 +1,133 @@
+"""
+Shared Resources
+Process-wide registry of immutable, costly-to-build analysis resources
+"""
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """
+    Registry of resources that every request needs but nobody modifies:
+    the VADER lexicon, emoji tables, compiled patterns and stopword sets.
+    
+    Modules register a builder per resource when they are imported, and
+    code that needs a resource gets the shared instance with ``get``. Each
+    resource is built once per process, on first use or by ``preload``;
+    preloading before worker processes fork lets them share the pages
+    copy-on-write instead of each building its own.
+    """
+    
+    def __init__(self):
+        self._builders: Dict[str, Callable[[], Any]] = {}
+        self._resources: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.build_seconds: Dict[str, float] = {}  # time each resource took to build
+        self.warmup_state = 'idle'  # then 'warming', and 'ready' or 'failed'
+        self._warmed = threading.Event()
+    
+    def register(self, name: str) -> Callable[[Callable[[], Any]], Callable[[], Any]]:
+        """
+        Decorator registering a function that builds the resource ``name``.
+        
+        The builder is returned unchanged; call ``get`` for the shared instance.
+        """
+        def decorator(builder: Callable[[], Any]) -> Callable[[], Any]:
+            if name in self._builders:
+                raise ValueError(f"Resource {name!r} is already registered")
+            self._builders[name] = builder
+            return builder
+        return decorator
+    
+    def get(self, name: str) -> Any:
+        """Get a resource, building it if this is its first use in the process."""
+        try:
+            return self._resources[name]
+        except KeyError:
+            pass
+        
+        with self._lock:
+            if name not in self._resources:
+                if name not in self._builders:
+                    raise KeyError(f"Unknown resource {name!r}")
+                start = time.perf_counter()
+                self._resources[name] = self._builders[name]()
+                self.build_seconds[name] = time.perf_counter() - start
+            return self._resources[name]
+    
+    def preload(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Build the given resources (all registered ones by default) now.
+        
+        Returns:
+            Seconds each of them took to build
+        """
+        names = list(self._builders) if names is None else list(names)
+        start = time.perf_counter()
+        for name in names:
+            self.get(name)
+        logger.info(f"Preloaded {len(names)} resources in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return {name: self.build_seconds.get(name, 0.0) for name in names}
+    
+    def warm_up(self, prepare: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Preload every resource on a background thread, unless a warm-up has
+        already been started; ``warmup_state`` tracks its progress.
+        
+        Args:
+            prepare: Called on the thread first, e.g. to import the modules
+                     that register resources
+        
+        Returns:
+            Whether this call started the warm-up
+        """
+        with self._lock:
+            if self.warmup_state != 'idle':
+                return False
+            self.warmup_state = 'warming'
+        
+        def run() -> None:
+            try:
+                if prepare:
+                    prepare()
+                self.preload()
+                self.warmup_state = 'ready'
+            except Exception as e:
+                # Whatever did not load is still built on first use
+                logger.error(f"Warm-up failed: {str(e)}")
+                self.warmup_state = 'failed'
+            finally:
+                self._warmed.set()
+        
+        threading.Thread(target=run, name="resource-warmup", daemon=True).start()
+        return True
+    
+    def wait_for_warm_up(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a running warm-up has finished; returns at once if none
+        was started.
+        
+        Returns:
+            False if ``timeout`` seconds passed first
+        """
+        if self.warmup_state == 'idle':
+            return True
+        return self._warmed.wait(timeout)
+    
+    @property
+    def registered(self) -> List[str]:
+        """Names of all registered resources."""
+        return list(self._builders)
+    
+    @property
+    def loaded(self) -> List[str]:
+        """Names of the resources built so far."""
+        return list(self._resources)
+
+
+# Shared registry for the process
+resources = ResourceRegistry()
@@ -0,0 +1,172 @@
+"""
+Batch Upload Route
+Analyze several chat exports in one request, fanned out across processes
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..cache import result_cache, content_key
+from ..sessions import session_store
+from ..executor import map_in_processes, ExecutorBusyError
+from ..metrics import pipeline_metrics
+from ..models.schemas import (
+    WrappedData,
+    BatchChatResult,
+    BatchRollup,
+    BatchUploadResponse,
+    PersonShare
+)
+from .upload import SLIDES_QUERY, _analyze_chat, _success_message, _validate_upload, parse_slide_selector
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+BATCH_TOO_LARGE_DETAIL = (
+    f"Batch too large. The maximum is {settings.BATCH_MAX_TOTAL_MB} MB in total "
+    f"and {settings.MAX_FILE_SIZE_MB} MB per file."
+)
+
+
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_batch(files: List[UploadFile] = File(...), slides: Optional[str] = SLIDES_QUERY):
+    """
+    Upload several WhatsApp chat exports and analyze them side by side.
+    
+    Each chat is parsed and analyzed on its own worker process. Returns the
+    wrapped data and a session id per chat, in upload order, plus a roll-up
+    across the chats: total messages, the most active chat and each
+    person's share of all messages (people are matched by display name).
+    A chat that cannot be analyzed is reported in its entry without failing
+    the others.
+    """
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Upload at most {settings.BATCH_MAX_FILES} chats at once."
+        )
+    for file in files:
+        _validate_upload(file)
+    # The request body limit leaves room for multipart framing; this is exact
+    if sum(file.size or 0 for file in files) > settings.BATCH_MAX_TOTAL_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=BATCH_TOO_LARGE_DETAIL)
+    
+    try:
+        selected = parse_slide_selector(slides)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # The roll-up is built from slide 4, so it is always computed
+    computed = selected if selected is None or 'slide4' in selected else selected + ['slide4']
+    
+    # Worker processes need the bytes; repeat chats come from the cache
+    contents = [await file.read() for file in files]
+    keys = [
+        await run_in_threadpool(content_key, content) if result_cache.enabled else None
+        for content in contents
+    ]
+    outcomes: List[object] = [result_cache.get(key, computed) if key else None for key in keys]
+    
+    misses = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    try:
+        results = await map_in_processes(_analyze_batch_chat, [(contents[i], computed) for i in misses])
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="The server is busy analyzing other chats. Please try again shortly."
+        )
+    for i, result in zip(misses, results):
+        if not isinstance(result, BaseException):
+            wrapped_data, message_count, timings, memory = result
+            pipeline_metrics.observe('batch', timings, message_count, len(contents[i]), memory)
+            result = (wrapped_data, message_count)
+            if keys[i]:
+                result_cache.put(keys[i], *result)
+        outcomes[i] = result
+    
+    chats = []
+    analyzed: List[Tuple[str, WrappedData, int]] = []
+    for file, key, outcome in zip(files, keys, outcomes):
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, ValueError):
+                logger.error(f"Error processing chat {file.filename}: {str(outcome)}")
+                outcome = f"Error processing chat: {str(outcome)}"
+            chats.append(BatchChatResult(filename=file.filename, success=False, message=str(outcome)))
+            continue
+        
+        wrapped_data, message_count = outcome
+        analyzed.append((file.filename, wrapped_data, message_count))
+        session_id = session_store.create(None, wrapped_data, message_count, key).id
+        if selected is not None and 'slide4' not in selected:
+            wrapped_data = wrapped_data.model_copy(update={'slide4': None})
+        chats.append(BatchChatResult(
+            filename=file.filename,
+            success=True,
+            message=_success_message(wrapped_data, message_count),
+            session_id=session_id,
+            data=wrapped_data
+        ))
+    
+    logger.info(f"Processed batch of {len(files)} chats, {len(analyzed)} successfully")
+    
+    return BatchUploadResponse(
+        success=bool(analyzed),
+        message=f"Successfully analyzed {len(analyzed)} of {len(files)} chats",
+        chats=chats,
+        rollup=_build_rollup(analyzed)
+    )
+
+
+def _analyze_batch_chat(
+    content: bytes,
+    slides: Optional[List[str]]
+) -> Tuple[WrappedData, int, Dict[str, float], Optional[Dict[str, Tuple[int, int]]]]:
+    """
+    Analyze one chat of a batch on a worker process.
+    
+    Parsing stays on this process: the batch already keeps every worker
+    busy, and a pool per large chat would fork processes from processes.
+    
+    Returns:
+        (wrapped data, message count, stage timings, stage memory if
+        tracked); the parsed chat stays in the worker rather than being
+        pickled back
+    """
+    wrapped_data, df = _analyze_chat(content, len(content), None, slides, parallel_parse=False)
+    return wrapped_data, len(df), df.attrs['timings'], df.attrs.get('memory')
+
+
+def _build_rollup(analyzed: List[Tuple[str, WrappedData, int]]) -> BatchRollup:
+    """Combine the analyzed chats of a batch (filename, data, message count)."""
+    total_messages = sum(message_count for _, _, message_count in analyzed)
+    
+    # Per-person totals from each chat's contributors
+    messages: Dict[str, int] = {}
+    chats: Dict[str, int] = {}
+    for _, wrapped_data, _ in analyzed:
+        for contributor in wrapped_data.slide4.contributors:
+            messages[contributor.name] = messages.get(contributor.name, 0) + contributor.messages
+            chats[contributor.name] = chats.get(contributor.name, 0) + 1
+    
+    people = [
+        PersonShare(
+            name=name,
+            messages=count,
+            percentage=round(count / total_messages * 100, 1),
+            chats=chats[name]
+        )
+        for name, count in messages.items()
+    ]
+    people.sort(key=lambda x: x.messages, reverse=True)
+    
+    most_active = max(analyzed, key=lambda chat: chat[2], default=None)
+    
+    return BatchRollup(
+        total_chats=len(analyzed),
+        total_messages=total_messages,
+        most_active_chat=most_active[0] if most_active else None,
+        most_active_chat_messages=most_active[2] if most_active else 0,
+        people=people
+    )
@@ -0,0 +1,89 @@
+"""
+Background Job Routes
+Submit large chats for analysis and poll their progress instead of waiting
+"""
+import logging
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response
+
+from ..executor import ExecutorBusyError
+from ..jobs import Job, job_manager
+from ..metrics import pipeline_metrics
+from ..models.schemas import JobResponse, JobQueueStats
+from .upload import _analyze_chat, _success_message, _validate_upload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(response: Response, file: UploadFile = File(...)):
+    """
+    Queue a WhatsApp chat export for analysis.
+    
+    Returns the job id right away; poll GET /api/jobs/{job_id} for progress
+    and the wrapped data.
+    """
+    _validate_upload(file)
+    
+    # The spooled upload is closed once this request ends, so keep the bytes
+    content = await file.read()
+    
+    def analyze(job: Job):
+        wrapped_data, df = _analyze_chat(content, len(content), on_progress=job.step_done)
+        message_count = len(df)
+        pipeline_metrics.observe('jobs', df.attrs.pop('timings', {}), message_count, len(content), df.attrs.pop('memory', None))
+        logger.info(f"Job {job.id} processed chat with {message_count} messages")
+        return wrapped_data, _success_message(wrapped_data, message_count)
+    
+    try:
+        job = job_manager.submit(analyze)
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="The server is busy analyzing other chats. Please try again shortly.",
+            headers={"Retry-After": "10"}
+        )
+    
+    response.headers["X-Queue-Depth"] = str(job_manager.queued)
+    return _job_response(job)
+
+
+@router.get("/jobs", response_model=JobQueueStats)
+async def get_queue_stats():
+    """Current load of the job pool, for load balancers to shed traffic on."""
+    return JobQueueStats(
+        queued=job_manager.queued,
+        running=job_manager.running,
+        workers=job_manager.max_workers,
+        queue_limit=job_manager.queue_limit,
+        accepting=job_manager.accepting
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """
+    Get a job's status and per-slide progress.
+    
+    Completed jobs include the wrapped data for all 10 slides until they
+    expire.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found. It may have expired.")
+    
+    return _job_response(job)
+
+
+def _job_response(job: Job) -> JobResponse:
+    """Build the response for a job's current state."""
+    data = job.result if job.status == 'completed' else None
+    return JobResponse(
+        job_id=job.id,
+        status=job.status,
+        progress=dict(job.progress),
+        queue_depth=job_manager.queued,
+        message=job.message,
+        data=data
+    )
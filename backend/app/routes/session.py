@@ -0,0 +1,106 @@
+"""
+Session Routes
+Fetch the slides of an earlier upload again, or delete them
+"""
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Response
+
+from ..cache import result_cache
+from ..executor import run_in_executor, ExecutorBusyError
+from ..sessions import Session, session_store
+from ..models.schemas import UploadResponse, SlideResponse, WrappedData
+from .upload import SLIDE_NAMES, SLIDES_QUERY, parse_slide_selector, _run_analyzers, _success_message
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/session/{session_id}", response_model=UploadResponse)
+async def get_session(session_id: str, slides: Optional[str] = SLIDES_QUERY):
+    """
+    Get the wrapped data of an earlier upload.
+    
+    Slides the upload did not compute are computed from the retained chat.
+    """
+    session = _get_session(session_id)
+    try:
+        selected = parse_slide_selector(slides) or SLIDE_NAMES
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    data = await _ensure_slides(session, selected)
+    return UploadResponse(
+        success=True,
+        message=_success_message(data, session.message_count),
+        session_id=session.id,
+        data=data
+    )
+
+
+@router.get("/session/{session_id}/slide/{n}", response_model=SlideResponse)
+async def get_session_slide(session_id: str, n: int):
+    """Get one slide (1-10) of an earlier upload."""
+    session = _get_session(session_id)
+    try:
+        name, = parse_slide_selector(str(n))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    data = await _ensure_slides(session, [name])
+    return SlideResponse(
+        session_id=session.id,
+        slide=name,
+        data=getattr(data, name).model_dump(mode='json')
+    )
+
+
+@router.delete("/session/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    """Delete an upload's chat and slides now, including cached results."""
+    session = session_store.delete(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found. It may have expired.")
+    if session.cache_key:
+        result_cache.delete(session.cache_key)
+    
+    return Response(status_code=204)
+
+
+def _get_session(session_id: str) -> Session:
+    """Look a session up or raise 404."""
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found. It may have expired.")
+    return session
+
+
+async def _ensure_slides(session: Session, names: List[str]) -> WrappedData:
+    """Get the given slides of a session, computing any that are missing."""
+    missing = [name for name in names if getattr(session.data, name) is None]
+    if missing:
+        if session.df is None:
+            raise HTTPException(
+                status_code=409,
+                detail="These slides were not computed for this session. Please upload the chat again."
+            )
+        try:
+            computed = await run_in_executor(_run_analyzers, session.df, None, missing)
+        except ExecutorBusyError:
+            raise HTTPException(
+                status_code=503,
+                detail="The server is busy analyzing other chats. Please try again shortly."
+            )
+        except Exception as e:
+            logger.error(f"Error processing chat: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+        
+        session_store.update(session, WrappedData(**{
+            name: getattr(session.data, name) if getattr(session.data, name) is not None else getattr(computed, name)
+            for name in SLIDE_NAMES
+        }))
+        if session.cache_key:
+            result_cache.put(session.cache_key, computed, session.message_count)
+    
+    return WrappedData(**{name: getattr(session.data, name) for name in names})
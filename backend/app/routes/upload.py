@@ -2,22 +2,27 @@
 Upload and Analysis Route
 Main endpoint for processing WhatsApp chat exports
 """
-import uuid
+import os
+import json
+import time
+import asyncio
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from typing import Dict, Any
+import pandas as pd
+from contextlib import nullcontext
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple, Union, BinaryIO
 
+from ..config import settings
+from ..cache import result_cache, content_key
+from ..sessions import session_store
+from ..metrics import StageTimer, pipeline_metrics, server_timing
+from ..memory import MemoryBudgetError, count_lines, messages_within_budget, tracked_pipeline
+from ..profiling import PipelineProfile
+from ..executor import run_in_executor, submit_to_thread, ExecutorBusyError
 from ..parser import WhatsAppParser
-from ..analytics import (
-    BasicStatsAnalyzer,
-    TemporalAnalyzer,
-    PersonalityAnalyzer,
-    EmojiAnalyzer,
-    MediaAnalyzer,
-    CodeDetector,
-    SentimentAnalyzer,
-    TopicModeler
-)
+from .. import analytics
 from ..models.schemas import (
     UploadResponse, 
     WrappedData, 
@@ -31,83 +36,100 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+SLIDE_NAMES = [f'slide{n}' for n in range(1, 11)]
+
+FILE_TOO_LARGE_DETAIL = f"File too large. The maximum upload size is {settings.MAX_FILE_SIZE_MB} MB."
+
+MEMORY_BUDGET_DETAIL = "This chat is too large to analyze within the server's memory budget."
+
+SLIDES_QUERY = Query(
+    None,
+    description="Comma-separated slides to compute, e.g. '5' or 'slide1,slide10'; all slides by default"
+)
+
 
 @router.post("/upload", response_model=UploadResponse)
-async def upload_chat(file: UploadFile = File(...)):
+async def upload_chat(
+    file: UploadFile = File(...),
+    slides: Optional[str] = SLIDES_QUERY,
+    profile: bool = Query(
+        False,
+        description="Debug mode only: profile this upload with cProfile and answer with the report instead of the slides"
+    )
+):
     """
     Upload and process a WhatsApp chat export file.
     
-    Returns complete wrapped data for all 10 slides.
+    Returns complete wrapped data for all 10 slides, or only for the slides
+    selected with ``slides``. The ``Server-Timing`` header breaks the request
+    down by stage: reading, hashing, each parse sub-stage, features, each
+    analyzer and serialization.
+    
+    With ``profile`` (DEBUG only) the upload bypasses the result cache and
+    runs under cProfile; the response is a text report of the time spent
+    per stage and analyzer and of the hottest functions, and the slides are
+    left in the session named by the ``X-Session-Id`` header.
     """
-    # Validate file type
-    if not file.filename.endswith('.txt'):
-        raise HTTPException(
-            status_code=400,
-            detail="Only .txt files are supported. Please export your WhatsApp chat as text."
-        )
+    if profile and not settings.DEBUG:
+        raise HTTPException(status_code=403, detail="Profiling is only available in debug mode.")
+    _validate_upload(file)
+    start = time.perf_counter()
+    timer = StageTimer()
     
     try:
-        # Read file content
-        content = await file.read()
-        content_str = content.decode('utf-8', errors='ignore')
+        selected = parse_slide_selector(slides)
         
-        if len(content_str.strip()) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="The uploaded file is empty."
-            )
+        # Threads can read the spooled upload directly; processes need the bytes
+        with timer.stage('read'):
+            await file.seek(0)
+            source = file.file if settings.ANALYSIS_EXECUTOR == 'thread' else await file.read()
         
-        # Parse chat
-        parser = WhatsAppParser()
-        df = parser.parse(content_str)
+        # Repeat uploads of the same export are answered from the cache
+        with timer.stage('cache'):
+            use_cache = result_cache.enabled and not profile
+            cache_key = await run_in_threadpool(content_key, source) if use_cache else None
+            cached = result_cache.get(cache_key, selected) if cache_key else None
+        if cached:
+            wrapped_data, message_count = cached
+            df = memory = None
+            logger.info(f"Served chat with {message_count} messages from the result cache")
+        else:
+            # Executor time includes waiting for a worker
+            with timer.stage('executor'):
+                wrapped_data, df = await run_in_executor(_analyze_chat, source, file.size, None, selected, profile)
+            timer.update(df.attrs.pop('timings', {}))
+            memory = df.attrs.pop('memory', None)
+            message_count = len(df)
+            if cache_key:
+                result_cache.put(cache_key, wrapped_data, message_count)
+            logger.info(f"Successfully processed chat with {message_count} messages")
         
-        if len(df) == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="No valid messages found in the chat export."
-            )
-        
-        # Run all analyzers
-        slide1 = BasicStatsAnalyzer(df).analyze()
-        slide2 = TemporalAnalyzer(df).analyze()
-        slide3 = PersonalityAnalyzer(df).analyze()
-        slide4 = _calculate_contributions(df)
-        slide5 = EmojiAnalyzer(df).analyze()
-        slide6 = MediaAnalyzer(df).analyze()
-        slide7 = CodeDetector(df).analyze()
-        slide8 = SentimentAnalyzer(df).analyze()
-        slide9 = TopicModeler(df).analyze()
-        slide10 = _generate_summary(
-            df, slide1, slide2, slide3, slide5
-        )
-        
-        # Combine all slide data
-        wrapped_data = WrappedData(
-            slide1=slide1,
-            slide2=slide2,
-            slide3=slide3,
-            slide4=slide4,
-            slide5=slide5,
-            slide6=slide6,
-            slide7=slide7,
-            slide8=slide8,
-            slide9=slide9,
-            slide10=slide10
-        )
-        
-        session_id = str(uuid.uuid4())
+        session_id = session_store.create(df, wrapped_data, message_count, cache_key).id
+        if profile:
+            return _profile_response(df.attrs.pop('profile'), session_id, timer.timings)
         
-        logger.info(f"Successfully processed chat with {len(df)} messages")
-        
-        return UploadResponse(
+        response = UploadResponse(
             success=True,
-            message=f"Successfully analyzed {len(df)} messages from {slide1.participants_count} participants",
+            message=_success_message(wrapped_data, message_count),
             session_id=session_id,
             data=wrapped_data
         )
+        # Serialized here rather than by FastAPI, so that it can be timed
+        with timer.stage('serialize'):
+            body = response.model_dump_json()
+        timer.add('total', time.perf_counter() - start)
+        
+        pipeline_metrics.observe('upload', timer.timings, message_count, file.size, memory)
+        headers = {'Server-Timing': server_timing(timer.timings, memory)} if settings.METRICS_ENABLED else None
+        return Response(content=body, media_type='application/json', headers=headers)
         
-    except HTTPException:
-        raise
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="The server is busy analyzing other chats. Please try again shortly."
+        )
+    except MemoryBudgetError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -118,25 +140,333 @@ async def upload_chat(file: UploadFile = File(...)):
         )
 
 
-def _calculate_contributions(df) -> Slide4Data:
+@router.post("/upload/stream")
+async def upload_chat_stream(file: UploadFile = File(...)):
+    """
+    Upload a WhatsApp chat export and stream the slides as Server-Sent Events.
+    
+    Sends a ``parsed`` event with the message count, then one ``slide``
+    event per slide as soon as its analyzer finishes, in completion order.
+    The final ``complete`` event carries slide 10 and the session id; an
+    ``error`` event replaces it if the analysis fails.
+    """
+    _validate_upload(file)
+    
+    # The spooled upload is closed once the handler returns, so keep the bytes
+    content = await file.read()
+    
+    loop = asyncio.get_running_loop()
+    steps: asyncio.Queue = asyncio.Queue()
+    
+    def on_progress(step: str, result: Any) -> None:
+        loop.call_soon_threadsafe(steps.put_nowait, (step, result))
+    
+    try:
+        future = submit_to_thread(_analyze_chat, content, len(content), on_progress)
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="The server is busy analyzing other chats. Please try again shortly."
+        )
+    # Completes after every step callback has been queued
+    future.add_done_callback(lambda _: steps.put_nowait(None))
+    
+    return StreamingResponse(
+        _stream_slides(steps, future, len(content)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _stream_slides(
+    steps: asyncio.Queue,
+    future: "asyncio.Future[Tuple[WrappedData, pd.DataFrame]]",
+    size: int
+) -> AsyncIterator[str]:
+    """Turn pipeline progress into SSE events, ending with slide 10."""
+    while (item := await steps.get()) is not None:
+        step, result = item
+        if step == 'parse':
+            yield _sse_event('parsed', {"message_count": result})
+        elif step != 'slide10':
+            yield _sse_event('slide', {"slide": step, "data": result.model_dump(mode='json')})
+    
+    try:
+        wrapped_data, df = future.result()
+    except ValueError as e:
+        yield _sse_event('error', {"detail": str(e)})
+        return
+    except Exception as e:
+        logger.error(f"Error processing chat: {str(e)}")
+        yield _sse_event('error', {"detail": f"Error processing chat: {str(e)}"})
+        return
+    
+    message_count = len(df)
+    pipeline_metrics.observe('stream', df.attrs.pop('timings', {}), message_count, size, df.attrs.pop('memory', None))
+    session = session_store.create(df, wrapped_data, message_count)
+    logger.info(f"Successfully streamed chat with {message_count} messages")
+    
+    yield _sse_event('complete', {
+        "slide": "slide10",
+        "data": wrapped_data.slide10.model_dump(mode='json'),
+        "session_id": session.id,
+        "message": _success_message(wrapped_data, message_count)
+    })
+
+
+def _profile_response(profile: PipelineProfile, session_id: str, timings: Dict[str, float]) -> PlainTextResponse:
+    """Answer a profiled upload with its report, keeping the profile in PROFILE_DIR if set."""
+    headers = {'X-Session-Id': session_id, 'Server-Timing': server_timing(timings)}
+    if settings.PROFILE_DIR:
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILE_DIR, f"{session_id}.prof")
+        profile.dump(path)
+        headers['X-Profile-Path'] = path
+        logger.info(f"Saved upload profile to {path}")
+    return PlainTextResponse(profile.report(), headers=headers)
+
+
+def _validate_upload(file: UploadFile) -> None:
+    """Reject uploads that are not .txt files or exceed MAX_FILE_SIZE_MB."""
+    if not file.filename.endswith('.txt'):
+        raise HTTPException(
+            status_code=400,
+            detail="Only .txt files are supported. Please export your WhatsApp chat as text."
+        )
+    # The request body limit leaves room for multipart framing; this is exact
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=FILE_TOO_LARGE_DETAIL)
+
+
+def parse_slide_selector(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a ``slides`` selector such as '5' or 'slide1,slide10' into slide
+    names, or None for all slides.
+    
+    Raises:
+        ValueError: If a slide is unknown
+    """
+    if not value:
+        return None
+    
+    selected = []
+    for part in value.split(','):
+        part = part.strip().lower()
+        name = part if part.startswith('slide') else f'slide{part}'
+        if name not in SLIDE_NAMES:
+            raise ValueError(f"Unknown slide {part!r}. Choose from 1 to 10.")
+        if name not in selected:
+            selected.append(name)
+    return selected
+
+
+def _success_message(wrapped_data: WrappedData, message_count: int) -> str:
+    """Summary line for a finished analysis."""
+    if wrapped_data.slide1 is None:
+        return f"Successfully analyzed {message_count} messages"
+    return f"Successfully analyzed {message_count} messages from {wrapped_data.slide1.participants_count} participants"
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _analyze_chat(
+    source: Union[BinaryIO, bytes],
+    size: Optional[int],
+    on_progress: Optional[Callable[[str, Any], None]] = None,
+    slides: Optional[List[str]] = None,
+    profile: bool = False,
+    parallel_parse: bool = True
+) -> Tuple[WrappedData, pd.DataFrame]:
+    """
+    Parse an export and run every analyzer on it.
+    
+    Runs in the analysis executor, so it only raises exceptions that can be
+    passed back from a worker process; invalid exports raise ValueError, and
+    MemoryBudgetError if they would not fit MEMORY_BUDGET_MB.
+    
+    Args:
+        source: Spooled upload or its bytes
+        size: Upload size in bytes, if known
+        on_progress: Called with ('parse', message count) once the chat is
+                     parsed, then with each slide name and its data as that
+                     slide is ready
+        slides: Slides to compute, with whatever they depend on; all by default
+        profile: Profile every stage with cProfile, into ``df.attrs['profile']``
+        parallel_parse: Split exports over PARALLEL_PARSE_THRESHOLD_MB across
+                        processes; off where the caller already runs on one
+                        of several worker processes
+    
+    With TRACK_MEMORY, the peak and net bytes allocated by each stage are
+    left in ``df.attrs['memory']``, next to the timings.
+    
+    Returns:
+        (wrapped data for the selected slides, parsed chat DataFrame)
+    """
+    max_messages, overflow = _apply_memory_budget(source, size)
+    
+    # Tracked pipelines take turns, since tracemalloc's peak is process-wide
+    with tracked_pipeline() if settings.TRACK_MEMORY else nullcontext():
+        # Parse chat straight from the spooled upload, decoding it incrementally;
+        # large exports are split across processes instead. Chats longer than
+        # MAX_MESSAGES are cut or sampled per MESSAGE_LIMIT_POLICY
+        timer = StageTimer(PipelineProfile() if profile else None, track_memory=settings.TRACK_MEMORY)
+        parser = WhatsAppParser(
+            compact=True,
+            max_messages=max_messages,
+            overflow=overflow
+        )
+        try:
+            with timer.stage('parse'):
+                if parallel_parse and size is not None and size >= settings.PARALLEL_PARSE_THRESHOLD_MB * 1024 * 1024:
+                    content = source if isinstance(source, bytes) else source.read()
+                    df = parser.parse_parallel(content, workers=settings.PARSE_WORKERS or None)
+                else:
+                    df = parser.parse_stream(source)
+        except ValueError:
+            if parser.line_count == 0:
+                raise ValueError("The uploaded file is empty.")
+            raise
+        
+        # Parse sub-stages: read and decode the upload, extract messages
+        # (including datetime conversion), then classify, count words etc.
+        timer.update(parser.timings, prefix='parse_')
+        
+        if len(df) == 0:
+            raise ValueError("No valid messages found in the chat export.")
+        
+        # Derive the per-message features the analyzers share, once
+        with timer.stage('features'):
+            df = analytics.add_message_features(df)
+        if on_progress:
+            on_progress('parse', len(df))
+        
+        wrapped_data = _run_analyzers(df, on_progress, slides, timer)
+        # Travels with the frame, also back from a worker process
+        df.attrs['timings'] = timer.timings
+        if timer.track_memory:
+            df.attrs['memory'] = timer.memory
+            logger.info("Analysis memory (peak/net): " + ', '.join(
+                f"{name}={peak / 2**20:.1f}/{net / 2**20:+.1f}MB" for name, (peak, net) in timer.memory.items()
+            ))
+        if profile:
+            df.attrs['profile'] = timer.profile
+        return wrapped_data, df
+
+
+def _apply_memory_budget(source: Union[BinaryIO, bytes], size: Optional[int]) -> Tuple[Optional[int], str]:
+    """
+    Check an export against MEMORY_BUDGET_MB before parsing it.
+    
+    The pipeline's peak is projected from the export's size and line count,
+    counting only the MAX_MESSAGES that would be kept. Over budget, the
+    export is rejected or sampled down to the messages that fit, per
+    MEMORY_BUDGET_POLICY.
+    
+    Returns:
+        (max_messages, overflow policy) for the parser
+    
+    Raises:
+        MemoryBudgetError: If it does not fit and the policy is 'reject'
+    """
+    max_messages = settings.MAX_MESSAGES or None
+    overflow = settings.MESSAGE_LIMIT_POLICY
+    if not settings.MEMORY_BUDGET_MB or not size:
+        return max_messages, overflow
+    
+    line_count = count_lines(source)
+    kept_lines = min(line_count, max_messages or line_count)
+    fits = messages_within_budget(size * kept_lines // line_count, kept_lines, int(settings.MEMORY_BUDGET_MB * 2**20))
+    if fits is None:
+        return max_messages, overflow
+    
+    if settings.MEMORY_BUDGET_POLICY == 'reject' or fits == 0:
+        raise MemoryBudgetError(MEMORY_BUDGET_DETAIL)
+    logger.warning(f"Chat of {line_count} lines exceeds the memory budget; sampling {fits} messages")
+    return fits, 'sample'
+
+
+def _run_analyzers(
+    df: pd.DataFrame,
+    on_progress: Optional[Callable[[str, Any], None]] = None,
+    slides: Optional[List[str]] = None,
+    timer: Optional[StageTimer] = None
+) -> WrappedData:
+    """
+    Compute slides for a parsed chat.
+    
+    Args:
+        df: Parsed chat DataFrame
+        on_progress: Called with each slide name and its data as it is ready
+        slides: Slides to compute, with whatever they depend on; all by default
+        timer: Gets the time of each analysis step and of the whole analysis,
+               and their profiles if it has a profile
+    """
+    # Large chats get sampled sentiment and topics; counting slides stay exact
+    sentiment_options: Dict[str, Any] = {}
+    topic_options: Dict[str, Any] = {}
+    if settings.APPROXIMATE_THRESHOLD and len(df) >= settings.APPROXIMATE_THRESHOLD:
+        sentiment_options = {'sample_per_month': settings.SENTIMENT_SAMPLE_PER_MONTH, 'seed': settings.SAMPLE_SEED}
+        topic_options = {'sample_size': settings.TOPIC_SAMPLE_SIZE, 'seed': settings.SAMPLE_SEED}
+    
+    # Run the analyzers, the slowest ones first so they start right away.
+    # Profiled runs take one step at a time, so that the steps' profiles are
+    # not inflated by waiting on each other for the GIL; so do runs tracking
+    # memory, which tracemalloc can only attribute to one step at a time
+    timer = timer or StageTimer()
+    profiling = timer.profile is not None
+    scheduler = analytics.AnalysisScheduler(
+        max_workers=1 if profiling or timer.track_memory else settings.ANALYZER_WORKERS,
+        use_processes=settings.ANALYZER_EXECUTOR == 'process',
+        profile=profiling,
+        track_memory=timer.track_memory
+    )
+    scheduler.add('senders', analytics.build_sender_table)
+    scheduler.add_analyzer('slide9', analytics.TopicModeler, **topic_options)
+    scheduler.add_analyzer('slide8', analytics.SentimentAnalyzer, **sentiment_options)
+    scheduler.add_analyzer('slide3', analytics.PersonalityAnalyzer, depends_on=['senders'])
+    scheduler.add_analyzer('slide5', analytics.EmojiAnalyzer)
+    scheduler.add_analyzer('slide7', analytics.CodeDetector)
+    scheduler.add_analyzer('slide1', analytics.BasicStatsAnalyzer)
+    scheduler.add_analyzer('slide2', analytics.TemporalAnalyzer)
+    scheduler.add_analyzer('slide6', analytics.MediaAnalyzer)
+    scheduler.add('slide4', _calculate_contributions, depends_on=['senders'])
+    scheduler.add('slide10', _generate_summary, depends_on=['slide1', 'slide2', 'slide3', 'slide5'])
+    
+    # The shared sender table is an intermediate step, not a slide
+    def on_step_done(name: str, result: Any) -> None:
+        if on_progress and name in SLIDE_NAMES:
+            on_progress(name, result)
+    
+    with timer.stage('analyze', instrumented=False):
+        results = scheduler.run(df, on_step_done=on_step_done, only=slides or SLIDE_NAMES)
+    timer.update(scheduler.timings)
+    timer.memory.update(scheduler.memory)
+    for name, stats in scheduler.profiles.items():
+        timer.profile.add(name, stats, scheduler.timings[name])
+    
+    # Combine all slide data
+    return WrappedData(**results)
+
+
+def _calculate_contributions(df, sender_table: Optional[pd.DataFrame] = None) -> Slide4Data:
     """Calculate contribution statistics for each participant."""
     contributors = []
     total_messages = len(df)
     
-    # Group by sender
-    sender_stats = df.groupby('sender').agg({
-        'message': 'count',
-        'word_count': 'sum'
-    }).reset_index()
-    sender_stats.columns = ['sender', 'messages', 'words']
-    
-    # Calculate average message length
-    for _, row in sender_stats.iterrows():
-        text_msgs = df[(df['sender'] == row['sender']) & (df['message_type'] == 'text')]
-        avg_length = text_msgs['word_count'].mean() if len(text_msgs) > 0 else 0
+    # Per-sender totals, in sender order
+    if sender_table is None:
+        sender_table = analytics.build_sender_table(df)
+    
+    for sender, row in sender_table.iterrows():
+        # Average length of text messages
+        text_messages = row['text_messages']
+        avg_length = row['text_words'] / text_messages if text_messages > 0 else 0
         
         contributors.append(ContributorStats(
-            name=row['sender'],
+            name=sender,
             messages=int(row['messages']),
             percentage=round(row['messages'] / total_messages * 100, 1),
             words=int(row['words']),
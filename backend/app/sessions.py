@@ -0,0 +1,110 @@
+"""
+Session Store
+Keeps parsed chats and their slides for a while, so they can be fetched again by session id
+"""
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+
+from .config import settings
+from .models.schemas import WrappedData
+
+
+class Session:
+    """A parsed chat and the slides computed for it so far."""
+    
+    def __init__(self, df: Optional[pd.DataFrame], data: WrappedData, message_count: int, cache_key: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.df = df  # None when the slides came from the result cache
+        self.data = data
+        self.message_count = message_count
+        self.cache_key = cache_key
+        self.size = 0
+        self.last_access = time.monotonic()
+    
+    def update_size(self) -> None:
+        """Recount the memory held by the frame and slides."""
+        frame_bytes = int(self.df.memory_usage(deep=True).sum()) if self.df is not None else 0
+        self.size = frame_bytes + len(self.data.model_dump_json())
+
+
+class SessionStore:
+    """
+    LRU store of sessions.
+    
+    Sessions expire ``ttl_seconds`` after they were last accessed, and the
+    least recently used ones are dropped while the frames and slides held
+    take more than ``max_bytes``.
+    """
+    
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def create(self, df: Optional[pd.DataFrame], data: WrappedData, message_count: int, cache_key: Optional[str] = None) -> Session:
+        """Store a new session; it is not retained if bigger than the whole store."""
+        session = Session(df, data, message_count, cache_key)
+        session.update_size()
+        with self._lock:
+            self._sessions[session.id] = session
+            self._bytes += session.size
+            self._evict()
+        return session
+    
+    def get(self, session_id: str) -> Optional[Session]:
+        """Get a session and mark it used, or None if unknown or expired."""
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+    
+    def update(self, session: Session, data: WrappedData) -> None:
+        """Replace a session's slides, e.g. after computing more of them."""
+        with self._lock:
+            session.data = data
+            if self._sessions.get(session.id) is session:
+                self._bytes -= session.size
+                session.update_size()
+                self._bytes += session.size
+                self._evict()
+    
+    def delete(self, session_id: str) -> Optional[Session]:
+        """Drop a session right away, returning it if it existed."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._bytes -= session.size
+            return session
+    
+    @property
+    def size(self) -> int:
+        """Bytes held by all sessions."""
+        return self._bytes
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def _evict(self) -> None:
+        """Drop expired sessions, then the least recently used while over the memory limit."""
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_access <= self.ttl_seconds and self._bytes <= self.max_bytes:
+                break
+            del self._sessions[session_id]
+            self._bytes -= session.size
+
+
+session_store = SessionStore(
+    max_bytes=int(settings.SESSION_MAX_MB * 1024 * 1024),
+    ttl_seconds=settings.SESSION_TTL_SECONDS
+)
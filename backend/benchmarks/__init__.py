@@ -0,0 +1 @@
+"""Benchmarks for the WhatsApp Wrapped backend (run with ``python -m benchmarks.<name>``)"""
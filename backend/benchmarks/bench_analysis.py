@@ -0,0 +1,55 @@
+"""
+Analysis Scheduling Benchmark
+Compares running the analyzers one after another with the concurrent scheduler
+
+Usage: python -m benchmarks.bench_analysis [n_messages] [workers]
+"""
+import os
+import sys
+import time
+
+from app.parser import WhatsAppParser
+from app import analytics
+from app.analytics import AnalysisScheduler
+from app.routes import upload
+from .synthetic import generate_chat
+
+
+def build(workers: int, use_processes: bool) -> AnalysisScheduler:
+    scheduler = AnalysisScheduler(max_workers=workers, use_processes=use_processes)
+    for name, analyzer_cls in (
+        ('slide9', analytics.TopicModeler), ('slide8', analytics.SentimentAnalyzer),
+        ('slide3', analytics.PersonalityAnalyzer), ('slide5', analytics.EmojiAnalyzer),
+        ('slide7', analytics.CodeDetector), ('slide1', analytics.BasicStatsAnalyzer),
+        ('slide2', analytics.TemporalAnalyzer), ('slide6', analytics.MediaAnalyzer),
+    ):
+        scheduler.add_analyzer(name, analyzer_cls)
+    scheduler.add('slide4', upload._calculate_contributions)
+    scheduler.add('slide10', upload._generate_summary, depends_on=['slide1', 'slide2', 'slide3', 'slide5'])
+    return scheduler
+
+
+def main(n_messages: int = 50_000, workers: int = 8) -> None:
+    df = WhatsAppParser(compact=True).parse_stream(generate_chat(n_messages).encode('utf-8'))
+    print(f"{len(df):,} messages, {os.cpu_count()} CPUs")
+    
+    # One worker runs the steps one after another, as the route used to
+    start = time.perf_counter()
+    sequential = build(1, use_processes=False)
+    expected = sequential.run(df)
+    serial = time.perf_counter() - start
+    for name, seconds in sorted(sequential.timings.items(), key=lambda item: -item[1]):
+        print(f"  {name:<8}{seconds:7.2f}s")
+    print(f"sequential: {serial:7.2f}s")
+    
+    for use_processes in (False, True):
+        start = time.perf_counter()
+        results = build(workers, use_processes).run(df)
+        elapsed = time.perf_counter() - start
+        assert results == expected, "scheduled results differ"
+        label = 'processes' if use_processes else 'threads'
+        print(f"{workers} {label + ':':<11}{elapsed:7.2f}s  ({serial / elapsed:.1f}x, identical)")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,51 @@
+"""
+Approximate Mode Benchmark
+Compares exact sentiment and topic analysis with their sampled versions
+
+Usage: python -m benchmarks.bench_approximate [max_messages]
+"""
+import sys
+import time
+
+from app.config import settings
+from app.parser import WhatsAppParser
+from app.analytics import SentimentAnalyzer, TopicModeler
+from .synthetic import generate_chat
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(max_messages: int = 100_000) -> None:
+    n_messages = 25_000
+    while n_messages <= max_messages:
+        df = WhatsAppParser(compact=True).parse_stream(generate_chat(n_messages).encode('utf-8'))
+        print(f"{len(df):,} messages")
+        
+        exact, exact_seconds = timed(lambda: SentimentAnalyzer(df).analyze())
+        approx, approx_seconds = timed(lambda: SentimentAnalyzer(
+            df, sample_per_month=settings.SENTIMENT_SAMPLE_PER_MONTH, seed=settings.SAMPLE_SEED
+        ).analyze())
+        covered = sum(
+            a.score_low <= e.score <= a.score_high
+            for e, a in zip(exact.monthly_sentiment, approx.monthly_sentiment)
+        )
+        worst = max(abs(e.score - a.score) for e, a in zip(exact.monthly_sentiment, approx.monthly_sentiment))
+        print(f"  sentiment  exact {exact_seconds:6.2f}s  sampled {approx_seconds:6.2f}s  "
+              f"(n={approx.sample_size:,}, max score error {worst:.3f}, "
+              f"{covered}/{len(exact.monthly_sentiment)} exact scores inside the 95% interval)")
+        
+        exact, exact_seconds = timed(lambda: TopicModeler(df).analyze())
+        approx, approx_seconds = timed(lambda: TopicModeler(
+            df, sample_size=settings.TOPIC_SAMPLE_SIZE, seed=settings.SAMPLE_SEED
+        ).analyze())
+        print(f"  topics     exact {exact_seconds:6.2f}s  sampled {approx_seconds:6.2f}s  "
+              f"(n={approx.sample_size:,}, labels {[t.label for t in exact.topics][:3]} vs {[t.label for t in approx.topics][:3]})")
+        n_messages *= 2
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,37 @@
+"""
+Batch Upload Benchmark
+Compares analyzing a batch of chats one after another with the process pool fan-out
+
+Usage: python -m benchmarks.bench_batch [n_chats] [n_messages] [workers]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.routes.batch import _analyze_batch_chat
+from .synthetic import generate_chat
+
+
+def main(n_chats: int = 8, n_messages: int = 5_000, workers: int = 0) -> None:
+    workers = workers or os.cpu_count() or 1
+    contents = [generate_chat(n_messages, seed=seed).encode('utf-8') for seed in range(n_chats)]
+    print(f"{n_chats} chats of {n_messages:,} messages, {os.cpu_count()} CPUs")
+    
+    # One chat after another, as separate uploads would be
+    start = time.perf_counter()
+    expected = [_analyze_batch_chat(content, None) for content in contents]
+    serial = time.perf_counter() - start
+    print(f"sequential:  {serial:7.2f}s  ({n_chats / serial:.2f} chats/s)")
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        executor.submit(int).result()  # start the pool outside the timing
+        start = time.perf_counter()
+        results = list(executor.map(_analyze_batch_chat, contents, [None] * n_chats))
+        elapsed = time.perf_counter() - start
+    assert [result[:2] for result in results] == [result[:2] for result in expected], "batch results differ"
+    print(f"{workers} processes: {elapsed:7.2f}s  ({n_chats / elapsed:.2f} chats/s, {serial / elapsed:.1f}x, identical)")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,54 @@
+"""
+Message Classification Benchmark
+Compares the per-message regex cascade against the single-pass classifier
+
+Usage: python -m benchmarks.bench_classify [n_messages]
+"""
+import sys
+import time
+
+import regex as re
+
+from app.parser import WhatsAppParser
+from .synthetic import generate_chat
+
+
+def legacy_classify(parser: WhatsAppParser, message: str) -> str:
+    """Per-message cascade as the parser used to run it through ``Series.apply``."""
+    message_lower = message.lower()
+    
+    for indicator in parser.SYSTEM_INDICATORS:
+        if indicator.lower() in message_lower:
+            return 'system'
+    
+    for media_type, patterns in parser.MEDIA_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, message, re.IGNORECASE):
+                return media_type
+    
+    return 'text'
+
+
+def main(n_messages: int = 500_000) -> None:
+    parser = WhatsAppParser()
+    messages, _ = parser._extract_frame(generate_chat(n_messages))
+    messages = messages['message']
+    print(f"{len(messages):,} messages")
+    
+    start = time.perf_counter()
+    expected = messages.apply(lambda message: legacy_classify(parser, message))
+    legacy = time.perf_counter() - start
+    print(f"per-message cascade: {legacy:8.2f}s")
+    
+    start = time.perf_counter()
+    labels = parser._classify_messages(messages)
+    single_pass = time.perf_counter() - start
+    print(f"single pass:         {single_pass:8.2f}s")
+    
+    assert labels.astype(object).equals(expected.astype(object)), "labels differ"
+    print(f"speedup: {legacy / single_pass:.1f}x (labels identical)")
+    print(labels.value_counts().to_string())
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000)
@@ -0,0 +1,40 @@
+"""
+Datetime Conversion Benchmark
+Compares per-line strptime fallback against sniffed, vectorized conversion
+
+Usage: python -m benchmarks.bench_datetime [n_lines]
+"""
+import sys
+import time
+
+import pandas as pd
+
+from app.parser import WhatsAppParser
+from .synthetic import generate_chat
+
+
+def main(n_lines: int = 1_000_000) -> None:
+    # MM/DD/YYYY 12-hour exports are the worst case for the per-line cascade
+    content = generate_chat(n_lines, style='mdy12')
+    parser = WhatsAppParser()
+    matches = list(parser.header_pattern.finditer(content))
+    date_strs = [m['date'] or m['bracket_date'] for m in matches]
+    time_strs = [m['time'] or m['bracket_time'] for m in matches]
+    print(f"{len(matches):,} header lines")
+    
+    start = time.perf_counter()
+    for date_str, time_str in zip(date_strs, time_strs):
+        parser._parse_datetime(date_str, time_str)
+    per_line = time.perf_counter() - start
+    print(f"per-line strptime:   {per_line:8.2f}s")
+    
+    start = time.perf_counter()
+    parser._convert_datetimes(pd.Series(date_strs), pd.Series(time_strs))
+    vectorized = time.perf_counter() - start
+    print(f"sniffed + vectorized: {vectorized:7.2f}s  (format {parser.datetime_format!r})")
+    
+    print(f"speedup: {per_line / vectorized:.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
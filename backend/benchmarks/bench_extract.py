@@ -0,0 +1,78 @@
+"""
+Message Extraction Benchmark
+Compares the original per-line parser loop against bulk extraction
+
+Usage: python -m benchmarks.bench_extract [n_messages]
+"""
+import sys
+import time
+from typing import List
+
+import pandas as pd
+import regex as re
+
+from app.parser import WhatsAppParser
+from .synthetic import generate_chat
+
+# The parser's per-line header patterns, one tried after another
+LEGACY_PATTERNS = [re.compile(p, re.MULTILINE) for p in WhatsAppParser.PATTERNS]
+
+
+def legacy_extract(parser: WhatsAppParser, lines: List[str]) -> list:
+    """Per-line loop as the parser used to run it: three regexes and a strptime cascade."""
+    messages = []
+    current = None
+    
+    for line in lines:
+        if not line.strip():
+            continue
+        
+        matched = False
+        for pattern in LEGACY_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                date_str, time_str, sender, message = match.groups()
+                dt = parser._parse_datetime(date_str, time_str)
+                if dt:
+                    if current:
+                        messages.append((current[0], current[1], '\n'.join(current[2])))
+                    current = (dt, sender.strip(), [message.strip()])
+                    matched = True
+                    break
+        
+        if not matched and current:
+            current[2].append(line.strip())
+    
+    if current:
+        messages.append((current[0], current[1], '\n'.join(current[2])))
+    
+    return messages
+
+
+def timed(label: str, n_lines: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16}{elapsed:6.2f}s  {n_lines / elapsed:12,.0f} lines/s")
+    return result, elapsed
+
+
+def main(n_messages: int = 1_000_000) -> None:
+    # DD/MM exports parse the same under the old per-line format cascade
+    lines = generate_chat(n_messages, style='dmy24').split('\n')
+    print(f"{len(lines):,} lines")
+    
+    parser = WhatsAppParser()
+    legacy, legacy_time = timed("per-line loop", len(lines), lambda: legacy_extract(parser, lines))
+    content = "\n".join(lines).encode('utf-8')
+    streaming, _ = timed("streaming", len(lines), lambda: list(WhatsAppParser().iter_messages(content)))
+    (bulk, _), bulk_time = timed("bulk", len(lines), lambda: WhatsAppParser()._extract_frame("\n".join(lines)))
+    
+    for records in (legacy, streaming):
+        expected = pd.DataFrame(records, columns=['datetime', 'sender', 'message'])
+        assert expected.astype(object).equals(bulk.astype(object)), "bulk output differs"
+    print(f"bulk vs per-line loop: {legacy_time / bulk_time:.1f}x (outputs identical)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,32 @@
+"""
+Parsed Frame Memory Benchmark
+Reports bytes per message for the default and compact frame schemas
+
+Usage: python -m benchmarks.bench_memory [n_messages]
+"""
+import sys
+
+import pandas as pd
+
+from app.parser import WhatsAppParser
+from .synthetic import generate_chat
+
+
+def main(n_messages: int = 1_000_000) -> None:
+    content = generate_chat(n_messages).encode('utf-8')
+    
+    usage = {}
+    for label, compact in (('default', False), ('compact', True)):
+        df = WhatsAppParser(compact=compact).parse_stream(content)
+        usage[label] = df.memory_usage(index=False, deep=True) / len(df)
+        print(f"{label}: {len(df):,} messages, {usage[label].sum():,.1f} bytes/message")
+    
+    table = pd.DataFrame(usage)
+    table.loc['total'] = table.sum()
+    print()
+    print(table.round(1).to_string(na_rep='-'))
+    print(f"\nreduction: {table.loc['total', 'default'] / table.loc['total', 'compact']:.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
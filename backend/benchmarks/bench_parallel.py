@@ -0,0 +1,35 @@
+"""
+Parallel Parse Benchmark
+Compares serial parsing with parse_parallel across worker counts
+
+Usage: python -m benchmarks.bench_parallel [n_messages] [max_workers]
+"""
+import os
+import sys
+import time
+
+from app.parser import WhatsAppParser
+from .synthetic import generate_chat
+
+
+def main(n_messages: int = 1_000_000, max_workers: int = 8) -> None:
+    content = generate_chat(n_messages).encode('utf-8')
+    print(f"{len(content) / 1024 / 1024:.1f} MB, {os.cpu_count()} CPUs")
+    
+    start = time.perf_counter()
+    expected = WhatsAppParser(compact=True).parse(content.decode('utf-8', errors='ignore'))
+    serial = time.perf_counter() - start
+    print(f"serial parse:        {serial:7.2f}s")
+    
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        df = WhatsAppParser(compact=True).parse_parallel(content, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert df.equals(expected), f"parallel result differs with {workers} workers"
+        print(f"parallel, {workers} workers: {elapsed:7.2f}s  ({serial / elapsed:.1f}x, identical)")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,37 @@
+"""
+Parse Stage Benchmark
+Reports per-stage parse timings and compares word counting with the row-wise apply
+
+Usage: python -m benchmarks.bench_parse [n_messages]
+"""
+import sys
+import time
+
+from app.parser import WhatsAppParser
+from .synthetic import generate_chat
+
+
+def main(n_messages: int = 1_000_000) -> None:
+    content = generate_chat(n_messages).encode('utf-8')
+    
+    parser = WhatsAppParser(compact=True)
+    df = parser.parse_stream(content)
+    print(f"{len(df):,} messages")
+    for stage, seconds in parser.timings.items():
+        print(f"  {stage:<12}{seconds:8.3f}s")
+    print(f"  {'total':<12}{sum(parser.timings.values()):8.3f}s")
+    
+    start = time.perf_counter()
+    expected = df.apply(
+        lambda row: len(row['message'].split()) if row['message_type'] == 'text' else 0,
+        axis=1
+    )
+    row_wise = time.perf_counter() - start
+    
+    assert (expected.to_numpy() == df['word_count'].to_numpy()).all(), "word counts differ"
+    print(f"\nword_count: row-wise apply {row_wise:.3f}s vs {parser.timings['word_count']:.3f}s "
+          f"({row_wise / parser.timings['word_count']:.0f}x, counts identical)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,50 @@
+"""
+Pipeline Memory Benchmark
+Peak and net allocations of each pipeline stage, and of a whole upload
+against the memory budget's projection
+
+Runs with TRACK_MEMORY, so analyzers take one step at a time under
+tracemalloc. Use it to recalibrate PEAK_BYTES_PER_MESSAGE and
+PEAK_BYTES_PER_TEXT_BYTE in app/memory.py: the projection should stay at or
+above the measured peak.
+
+Usage: python -m benchmarks.bench_pipeline_memory [max_messages]
+"""
+import sys
+
+from app import analytics
+from app.config import settings
+from app.memory import count_lines, projected_peak_bytes, traced_memory
+from app.resources import resources
+from app.routes.upload import _analyze_chat
+from .synthetic import generate_chat
+
+MB = 2**20
+
+
+def main(max_messages: int = 100_000) -> None:
+    settings.TRACK_MEMORY = True
+    settings.MEMORY_BUDGET_MB = 0
+    # Shared resources and imported modules are not part of any upload
+    analytics.import_analyzers()
+    resources.preload()
+    
+    n_messages = 10_000
+    while n_messages <= max_messages:
+        content = generate_chat(n_messages).encode('utf-8')
+        with traced_memory() as usage:
+            _, df = _analyze_chat(content, len(content))
+        peak = usage[0]
+        projected = projected_peak_bytes(len(content), count_lines(content))
+        
+        print(f"{len(df):,} messages, {len(content) / MB:.1f}MB export: "
+              f"peak {peak / MB:.0f}MB, projected {projected / MB:.0f}MB ({projected / peak:.2f}x), "
+              f"{peak / len(df):,.0f} bytes/message")
+        stages = sorted(df.attrs['memory'].items(), key=lambda item: -item[1][0])
+        for name, (stage_peak, net) in stages[:6]:
+            print(f"  {name:<10} peak {stage_peak / MB:7.1f}MB  net {net / MB:+7.1f}MB")
+        n_messages *= 2
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
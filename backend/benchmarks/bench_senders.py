@@ -0,0 +1,45 @@
+"""
+Sender Aggregates Benchmark
+Times Slides 3 and 4 and personality scoring as the number of participants grows
+
+Usage: python -m benchmarks.bench_senders [n_messages] [max_senders]
+"""
+import sys
+import time
+
+from app.parser import WhatsAppParser
+from app.analytics import PersonalityAnalyzer, build_sender_table
+from app.routes.upload import _calculate_contributions
+from .synthetic import generate_chat
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(n_messages: int = 50_000, max_senders: int = 3000) -> None:
+    n_senders = 10
+    while n_senders <= max_senders:
+        senders = [f"Member {i}" for i in range(n_senders)]
+        df = WhatsAppParser(compact=True).parse_stream(
+            generate_chat(n_messages, senders=senders).encode('utf-8')
+        )
+        
+        table, table_seconds = timed(lambda: build_sender_table(df))
+        _, personality_seconds = timed(lambda: PersonalityAnalyzer(df, table).analyze())
+        analyzer = PersonalityAnalyzer(df, table)
+        _, scoring_seconds = timed(lambda: analyzer._score_personalities(
+            analyzer._feature_matrix(table), len(df) / len(table)
+        ))
+        _, contributions_seconds = timed(lambda: _calculate_contributions(df, table))
+        print(f"{len(df):,} messages, {len(table):>5} senders  "
+              f"table {table_seconds:6.2f}s  slide3 {personality_seconds:6.2f}s "
+              f"(scoring {scoring_seconds * 1000:5.1f}ms)  "
+              f"slide4 {contributions_seconds:6.2f}s")
+        n_senders *= 10 if n_senders < 1000 else 3
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,100 @@
+"""
+Cold Start Benchmark
+Measures import time of the app and time until a fresh server answers /health
+
+The tracked number is time-to-first-/health: from launching uvicorn to the
+first 200 from /health. Import times come from ``python -X importtime``.
+
+Usage: python -m benchmarks.bench_startup [runs]
+"""
+import os
+import sys
+import time
+import socket
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+
+def import_times() -> List[Tuple[str, float]]:
+    """Cumulative import seconds of ``app.main`` and each top-level package it pulls in."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app.main'],
+        capture_output=True, text=True, env=_env(WARMUP_ON_STARTUP='false'), check=True
+    )
+    times: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        if '.' not in name or name == 'app.main':
+            times[name] = times.get(name, 0) + int(cumulative) / 1e6
+    return sorted(times.items(), key=lambda item: -item[1])
+
+
+def time_to_first_response(warm_up: bool, timeout: float = 60) -> Tuple[float, Optional[float]]:
+    """
+    Launch a server and poll it.
+    
+    Returns:
+        (seconds until /health answered 200, seconds until /ready did, or
+        None without a warm-up)
+    """
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        env=_env(WARMUP_ON_STARTUP=str(warm_up).lower()),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        health = _poll(f'http://127.0.0.1:{port}/health', start, timeout)
+        ready = _poll(f'http://127.0.0.1:{port}/ready', start, timeout) if warm_up else None
+        return health, ready
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _poll(url: str, start: float, timeout: float) -> float:
+    """Request ``url`` until it answers 200; return seconds since ``start``."""
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer within {timeout}s")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _env(**overrides: str) -> Dict[str, str]:
+    return {**os.environ, 'PRELOAD_RESOURCES': 'false', **overrides}
+
+
+def main(runs: int = 5) -> None:
+    times = import_times()
+    print("import app.main (python -X importtime, cumulative):")
+    for name, seconds in times[:8]:
+        print(f"  {name:<20}{seconds * 1000:7.0f}ms")
+    
+    for warm_up in (False, True):
+        results = [time_to_first_response(warm_up) for _ in range(runs)]
+        health = statistics.median(health for health, _ in results)
+        line = f"warm-up {'on ' if warm_up else 'off'}: first /health {health:5.2f}s"
+        if warm_up:
+            line += f", /ready {statistics.median(ready for _, ready in results):5.2f}s"
+        print(f"{line}  (median of {runs})")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,101 @@
+"""
+Health Latency Load Test
+Measures /health latency on a live server while large uploads are in flight
+
+Starts uvicorn on a free port with the current environment (so
+ANALYSIS_EXECUTOR, ANALYSIS_WORKERS etc. apply) and needs httpx.
+
+Usage: python -m benchmarks.load_health [n_uploads] [n_messages]
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+
+from .synthetic import generate_chat
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_up(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get('/health')
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def poll_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float = 0.05) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get('/health')
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+def report(label: str, latencies: List[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=20)
+    print(f"{label:<16}{len(latencies):6} requests  p50 {statistics.median(latencies):7.1f}ms  "
+          f"p95 {quantiles[-1]:7.1f}ms  max {max(latencies):7.1f}ms")
+
+
+async def run(port: int, n_uploads: int, content: bytes) -> None:
+    async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', timeout=None) as client:
+        await wait_until_up(client)
+        
+        stop = asyncio.Event()
+        idle = asyncio.create_task(poll_health(client, stop))
+        await asyncio.sleep(3)
+        stop.set()
+        report("idle", await idle)
+        
+        stop = asyncio.Event()
+        loaded = asyncio.create_task(poll_health(client, stop))
+        start = time.perf_counter()
+        uploads = await asyncio.gather(*(
+            client.post('/api/upload', files={'file': (f'chat{i}.txt', content)})
+            for i in range(n_uploads)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        report(f"{n_uploads} uploads", await loaded)
+        
+        statuses = [response.status_code for response in uploads]
+        print(f"uploads finished in {elapsed:.1f}s, statuses {sorted(set(statuses))}")
+
+
+def main(n_uploads: int = 8, n_messages: int = 100_000) -> None:
+    content = generate_chat(n_messages).encode('utf-8')
+    print(f"{n_uploads} uploads of {len(content) / 1024 / 1024:.1f} MB, "
+          f"executor {os.environ.get('ANALYSIS_EXECUTOR', 'thread')}")
+    
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    try:
+        asyncio.run(run(port, n_uploads, content))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,75 @@
+"""
+Synthetic Chat Generator
+Builds WhatsApp-style exports of arbitrary size for benchmarks
+"""
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+SENDERS = ["Arpit", "Riya", "Kabir Singh", "+91 98765 43210", "Meera", "Dev", "Zoya", "Sam"]
+
+TEXTS = [
+    "hello guys kya haal hai", "Kal milte hai college me?", "😂😂😂", "OMG THIS IS AMAZING!!!",
+    "ok", "bhai party kab hai", "Happy birthday 🎉🥳❤️", "def foo(x):\n    return x == 1",
+    "for (int i = 0; i < n; i++) { cout << i; }", "SELECT * FROM users WHERE id = 1",
+    "check this https://example.com/x?y=1", "gym chalte hai kal subah?", "movie dekhne chalo",
+    "I am so tired and stressed about exams 😢", "What time is the meetup?", "Love you all ❤️😍",
+    "hmm", "Long message line one\nline two continues here\nline three with more words",
+    "trip to delhi this weekend, food at the cafe", "project deadline and internship dsa prep",
+]
+
+MEDIA = [
+    "<Media omitted>", "image omitted", "video omitted", "audio omitted", "sticker omitted",
+    "GIF omitted", "document omitted", "contact card omitted", "location: https://maps.google.com/?q=1,2",
+]
+
+SYSTEM = [
+    "Messages and calls are end-to-end encrypted. No one outside of this chat can read them.",
+    "Arpit added Riya",
+    "This message was deleted",
+]
+
+# Header layouts keyed by style name
+STYLES = {
+    'dmy24': lambda dt: dt.strftime('%d/%m/%y, %H:%M - '),
+    'mdy12': lambda dt: f"{dt.month}/{dt.day}/{dt.year}, {dt.hour % 12 or 12}:{dt.minute:02d} {'AM' if dt.hour < 12 else 'PM'} - ",
+    'bracket': lambda dt: dt.strftime('[%d/%m/%Y, %H:%M:%S] '),
+}
+
+
+def generate_chat(
+    n_messages: int,
+    style: str = 'dmy24',
+    seed: int = 42,
+    senders: Optional[List[str]] = None
+) -> str:
+    """
+    Generate a synthetic chat export.
+    
+    Args:
+        n_messages: Number of messages (header lines) to generate
+        style: One of the keys of STYLES
+        seed: Random seed for reproducible output
+        senders: Participant names (defaults to SENDERS)
+        
+    Returns:
+        Export text in WhatsApp's .txt format
+    """
+    rnd = random.Random(seed)
+    header = STYLES[style]
+    senders = senders or SENDERS
+    current = datetime(2023, 1, 1, 8, 0, 0)
+    lines = []
+    
+    for _ in range(n_messages):
+        current += timedelta(minutes=rnd.choice([0, 1, 2, 3, 7, 30, 120, 600]))
+        roll = rnd.random()
+        if roll < 0.08:
+            body = rnd.choice(MEDIA)
+        elif roll < 0.1:
+            body = rnd.choice(SYSTEM)
+        else:
+            body = rnd.choice(TEXTS)
+        lines.append(f"{header(current)}{rnd.choice(senders)}: {body}")
+    
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,61 @@
+"""
+Result Cache Tests
+Content keys of equivalent exports, and what the cache keeps
+"""
+import io
+
+import pandas as pd
+import pytest
+
+from app import cache
+from app.cache import content_key
+from app.config import settings
+from app.parser import WhatsAppParser
+
+CHAT = b"01/02/24, 10:00 - Ann: hi\n01/02/24, 10:01 - Bob: hello\nthere\n"
+
+
+@pytest.mark.parametrize('variant', [
+    b'\xef\xbb\xbf' + CHAT,
+    CHAT.replace(b'\n', b'\r\n'),
+    b'\xef\xbb\xbf' + CHAT.replace(b'\n', b'\r\n'),
+])
+def test_bom_and_line_endings_do_not_change_the_key(variant):
+    assert content_key(variant) == content_key(CHAT)
+
+
+@pytest.mark.parametrize('variant', [
+    b'\xef\xbb\xbf' + CHAT,
+    CHAT.replace(b'\n', b'\r\n'),
+    b'\xef\xbb\xbf' + CHAT.replace(b'\n', b'\r\n'),
+])
+def test_exports_with_the_same_key_parse_the_same(variant):
+    # Whichever variant is uploaded first is served for the others
+    assert content_key(variant) == content_key(CHAT)
+    expected = WhatsAppParser(compact=True).parse_stream(CHAT)
+    
+    pd.testing.assert_frame_equal(WhatsAppParser(compact=True).parse_stream(variant), expected)
+    pd.testing.assert_frame_equal(WhatsAppParser(compact=True).parse_parallel(variant, workers=2), expected)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 5, 1024])
+def test_file_key_matches_bytes_key(monkeypatch, chunk_size):
+    # Small chunks split '\r\n' pairs and the BOM across reads
+    monkeypatch.setattr(cache, 'HASH_CHUNK_SIZE', chunk_size)
+    data = b'\xef\xbb\xbf' + CHAT.replace(b'\n', b'\r\n')
+    source = io.BytesIO(data)
+    source.seek(0)
+    
+    assert content_key(source) == content_key(CHAT)
+    assert source.tell() == 0
+
+
+def test_lone_carriage_returns_are_kept():
+    assert content_key(CHAT.replace(b'\n', b'\r')) != content_key(CHAT)
+
+
+def test_settings_that_change_results_change_the_key(monkeypatch):
+    key = content_key(CHAT)
+    monkeypatch.setattr(settings, 'MAX_MESSAGES', settings.MAX_MESSAGES + 1)
+    
+    assert content_key(CHAT) != key
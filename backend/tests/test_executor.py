@@ -0,0 +1,91 @@
+"""
+Executor Tests
+Recovery of the process pools after a worker dies, serial parsing in batch
+workers, and no forking during the resource warm-up
+"""
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app import executor
+from app.analytics.scheduler import AnalysisScheduler
+from app.config import settings
+from app.parser.whatsapp_parser import WhatsAppParser
+from app.resources import resources
+from app.routes.batch import _analyze_batch_chat
+from benchmarks.synthetic import generate_chat
+
+
+@pytest.fixture
+def process_executor(monkeypatch):
+    monkeypatch.setattr(settings, 'ANALYSIS_EXECUTOR', 'process')
+    monkeypatch.setattr(settings, 'ANALYSIS_WORKERS', 1)
+    monkeypatch.setattr(settings, 'BATCH_WORKERS', 1)
+    yield
+    executor.shutdown_executor()
+
+
+def test_analysis_pool_is_recreated_after_a_worker_dies(process_executor):
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await executor.run_in_executor(os._exit, 1)
+        return await executor.run_in_executor(abs, -3)
+    
+    assert asyncio.run(scenario()) == 3
+
+
+def test_batch_pool_is_recreated_after_a_worker_dies(process_executor):
+    async def scenario():
+        results = await executor.map_in_processes(os._exit, [(1,)])
+        assert isinstance(results[0], BrokenProcessPool)
+        return await executor.map_in_processes(abs, [(-3,), (4,)])
+    
+    assert asyncio.run(scenario()) == [3, 4]
+
+
+def test_batch_chats_are_parsed_serially(monkeypatch):
+    monkeypatch.setattr(settings, 'PARALLEL_PARSE_THRESHOLD_MB', 0)
+    
+    def parse_parallel(self, *args, **kwargs):
+        raise AssertionError("a batch worker started its own process pool")
+    
+    monkeypatch.setattr(WhatsAppParser, 'parse_parallel', parse_parallel)
+    content = generate_chat(200).encode('utf-8')
+    
+    _, message_count, _, _ = _analyze_batch_chat(content, ['slide1', 'slide4'])
+    
+    assert message_count > 0
+
+
+@pytest.fixture
+def fork_events(monkeypatch):
+    """Record waits for the warm-up and process pools created, in order."""
+    events = []
+    
+    class RecordedPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            events.append('fork')
+            super().__init__(*args, **kwargs)
+    
+    monkeypatch.setattr(resources, 'wait_for_warm_up', lambda timeout=None: events.append('wait') or True)
+    monkeypatch.setattr('app.parser.whatsapp_parser.ProcessPoolExecutor', RecordedPool)
+    monkeypatch.setattr('app.analytics.scheduler.ProcessPoolExecutor', RecordedPool)
+    return events
+
+
+def test_parallel_parse_waits_for_the_warm_up_before_forking(fork_events):
+    WhatsAppParser().parse_parallel(generate_chat(100), workers=2)
+    
+    assert fork_events == ['wait', 'fork']
+
+
+def test_process_scheduler_waits_for_the_warm_up_before_forking(fork_events):
+    scheduler = AnalysisScheduler(max_workers=1, use_processes=True)
+    scheduler.add('rows', len)
+    
+    assert scheduler.run(pd.DataFrame({'a': [1, 2, 3]})) == {'rows': 3}
+    assert fork_events == ['wait', 'fork']
@@ -0,0 +1,144 @@
+"""
+Job Manager Tests
+Lifecycle, the queue limit and eviction of finished jobs
+"""
+import threading
+import time
+
+import pytest
+
+from app.executor import ExecutorBusyError
+from app.jobs import Job, JobManager
+from app.models.schemas import ErrorResponse
+
+
+def make_manager(**overrides) -> JobManager:
+    options = dict(max_workers=1, queue_limit=1, ttl_seconds=60, max_result_bytes=1024 * 1024)
+    options.update(overrides)
+    return JobManager(**options)
+
+
+def wait_finished(job: Job, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not job.finished:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.005)
+
+
+def test_job_completes_with_progress():
+    manager = make_manager()
+    
+    def work(job):
+        job.step_done('parse')
+        assert job.status == 'analyzing'
+        return ErrorResponse(error="result", detail=None), "done"
+    
+    job = manager.submit(work)
+    wait_finished(job)
+    
+    assert job.status == 'completed'
+    assert job.message == "done"
+    assert job.progress['parse'] == 'done'
+    assert job.result_bytes > 0
+    assert manager.get(job.id) is job
+    manager.shutdown()
+
+
+@pytest.mark.parametrize('error, message', [
+    (ValueError("No valid messages"), "No valid messages"),
+    (RuntimeError("boom"), "Error processing chat: boom"),
+])
+def test_job_failure_keeps_message(error, message):
+    manager = make_manager()
+    
+    def work(job):
+        raise error
+    
+    job = manager.submit(work)
+    wait_finished(job)
+    
+    assert job.status == 'failed'
+    assert job.message == message
+    manager.shutdown()
+
+
+def test_submit_beyond_queue_limit_is_refused():
+    manager = make_manager()
+    release = threading.Event()
+    
+    def work(job):
+        release.wait(5)
+        return ErrorResponse(error="result"), "done"
+    
+    jobs = [manager.submit(work), manager.submit(work)]
+    with pytest.raises(ExecutorBusyError):
+        manager.submit(work)
+    
+    release.set()
+    for job in jobs:
+        wait_finished(job)
+    assert manager.accepting
+    manager.shutdown()
+
+
+def test_expired_jobs_are_evicted():
+    manager = make_manager(ttl_seconds=0)
+    job = manager.submit(lambda job: (ErrorResponse(error="result"), "done"))
+    wait_finished(job)
+    
+    assert manager.get(job.id) is None
+    manager.shutdown()
+
+
+def test_oldest_results_are_evicted_over_the_memory_limit():
+    manager = make_manager(max_workers=2, queue_limit=2, max_result_bytes=1)
+    first = manager.submit(lambda job: (ErrorResponse(error="first"), "done"))
+    wait_finished(first)
+    second = manager.submit(lambda job: (ErrorResponse(error="second"), "done"))
+    wait_finished(second)
+    
+    assert manager.get(first.id) is None
+    assert manager.get(second.id) is None  # alone still over the limit
+    manager.shutdown()
+
+
+def test_eviction_ignores_jobs_whose_finish_time_is_not_set_yet():
+    manager = make_manager()
+    job = Job()
+    job.status = 'completed'  # set by the worker just before finished_at
+    manager._jobs[job.id] = job
+    other = Job()
+    other.status = 'completed'
+    other.finished_at = time.monotonic()
+    manager._jobs[other.id] = other
+    
+    assert manager.get(job.id) is job
+    assert not job.finished
+
+
+@pytest.mark.parametrize('outcome', ['completed', 'failed'])
+def test_finished_at_is_set_whenever_the_status_is_terminal(monkeypatch, outcome):
+    seen = []
+    
+    class WatchedJob(Job):
+        def __setattr__(self, name, value):
+            if name == 'status' and value in ('completed', 'failed'):
+                seen.append((value, self.finished_at))
+            super().__setattr__(name, value)
+    
+    monkeypatch.setattr('app.jobs.Job', WatchedJob)
+    manager = make_manager()
+    
+    def work(job):
+        if outcome == 'failed':
+            raise ValueError("No valid messages")
+        return ErrorResponse(error="result"), "done"
+    
+    job = manager.submit(work)
+    wait_finished(job)
+    
+    assert len(seen) == 1
+    status, finished_at = seen[0]
+    assert status == outcome
+    assert finished_at is not None
+    manager.shutdown()
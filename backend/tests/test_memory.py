@@ -0,0 +1,63 @@
+"""
+Memory Accounting Tests
+tracemalloc blocks across threads and pipelines, and the memory budget
+"""
+import threading
+import time
+import tracemalloc
+
+from app.memory import traced_memory, tracked_pipeline
+
+
+def test_inner_block_on_another_thread_keeps_the_outer_peak():
+    def allocate():
+        with traced_memory() as usage:
+            buffer = bytearray(10_000_000)
+            del buffer
+        assert usage[0] >= 10_000_000
+    
+    with traced_memory() as outer:
+        worker = threading.Thread(target=allocate)
+        worker.start()
+        worker.join()
+    
+    assert outer[0] >= 10_000_000
+    assert outer[1] < 1_000_000
+
+
+def test_tracing_stops_after_the_last_block():
+    assert not tracemalloc.is_tracing()
+    with traced_memory():
+        with traced_memory():
+            pass
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        with traced_memory():
+            pass
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_tracked_pipelines_take_turns():
+    events = []
+    
+    def pipeline(n):
+        with tracked_pipeline():
+            events.append(('start', n))
+            time.sleep(0.02)
+            events.append(('end', n))
+    
+    workers = [threading.Thread(target=pipeline, args=(n,)) for n in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    
+    assert [kind for kind, _ in events] == ['start', 'end'] * 3
+    assert all(events[i][1] == events[i + 1][1] for i in range(0, 6, 2))
@@ -0,0 +1,61 @@
+"""
+Body Size Limit Tests
+Oversized request bodies are answered with 413 before the app reads them
+"""
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.middleware import BodySizeLimitMiddleware
+
+app = FastAPI()
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=100,
+    detail="Too large.",
+    path_limits={"/batch": (1000, "Batch too large.")}
+)
+
+
+@app.post("/echo")
+@app.post("/batch")
+async def echo(request: Request):
+    return {"size": len(await request.body())}
+
+
+client = TestClient(app)
+
+
+def chunks(size: int, chunk_size: int = 30):
+    for start in range(0, size, chunk_size):
+        yield b'x' * min(chunk_size, size - start)
+
+
+def test_body_within_the_limit_is_passed_on():
+    response = client.post("/echo", content=b'x' * 100)
+    
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_declared_length_over_the_limit_is_rejected():
+    response = client.post("/echo", content=b'x' * 101)
+    
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Too large."}
+
+
+def test_streamed_body_over_the_limit_is_rejected():
+    response = client.post("/echo", content=chunks(200))
+    
+    assert 'content-length' not in response.request.headers
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Too large."}
+
+
+def test_path_limit_replaces_the_default():
+    assert client.post("/batch", content=b'x' * 500).status_code == 200
+    
+    response = client.post("/batch", content=chunks(1001))
+    
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Batch too large."}
@@ -0,0 +1,106 @@
+"""
+Parser Tests
+parse, parse_stream and parse_parallel must produce the same frame
+"""
+import pandas as pd
+import pytest
+
+from app.parser import WhatsAppParser
+from benchmarks.synthetic import generate_chat
+
+
+def month_first_chat() -> str:
+    """An MM/DD export whose first 80 messages have no day above 12."""
+    lines = [
+        f"{month:02d}/{day:02d}/24, 10:{i % 60:02d} - Ann: hello {i}"
+        for i, (month, day) in enumerate([(1, 2), (2, 3), (3, 4), (4, 5)] * 20)
+    ]
+    lines += [f"05/{day:02d}/24, 11:00 - Bob: later" for day in range(13, 29)]
+    return '\n'.join(lines) + '\n'
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('batch_size', [1, 2, 7, 50, None])
+def test_stream_sniffs_format_from_every_batch(batch_size):
+    text = month_first_chat()
+    expected = WhatsAppParser().parse(text)
+    
+    df = WhatsAppParser().parse_stream(text.encode('utf-8'), batch_size=batch_size)
+    
+    assert df.attrs['datetime_format'] == expected.attrs['datetime_format'] == '%m/%d/%y %H:%M'
+    assert df['datetime'].iloc[1] == pd.Timestamp(2024, 2, 3, 10, 1)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize('style', ['dmy24', 'mdy12', 'bracket'])
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('batch_size, chunk_size', [(1, None), (2, None), (7, 5), (50, 64), (None, None)])
+def test_stream_matches_parse(style, compact, batch_size, chunk_size):
+    text = generate_chat(300, style)
+    expected = WhatsAppParser(compact=compact).parse(text)
+    
+    data = text.encode('utf-8')
+    source = chunked(data, chunk_size) if chunk_size else data
+    df = WhatsAppParser(compact=compact).parse_stream(source, batch_size=batch_size)
+    
+    assert df.attrs['datetime_format'] == expected.attrs['datetime_format']
+    pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize('style', ['dmy24', 'mdy12', 'bracket'])
+def test_iter_messages_matches_bulk_extraction(style):
+    text = generate_chat(300, style=style)
+    expected, _ = WhatsAppParser()._extract_frame(text)
+    
+    records = list(WhatsAppParser().iter_messages(chunked(text.encode('utf-8'), 64)))
+    
+    assert records == list(expected.itertuples(index=False, name=None))
+
+
+@pytest.mark.parametrize('style', ['dmy24', 'mdy12', 'bracket'])
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('workers', [1, 3])
+def test_parallel_matches_parse(style, compact, workers):
+    text = generate_chat(300, style)
+    expected = WhatsAppParser(compact=compact).parse(text)
+    
+    df = WhatsAppParser(compact=compact).parse_parallel(text.encode('utf-8'), workers=workers)
+    
+    assert df.attrs['datetime_format'] == expected.attrs['datetime_format']
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_parallel_sniffs_format_from_every_range():
+    text = month_first_chat()
+    expected = WhatsAppParser().parse(text)
+    
+    df = WhatsAppParser().parse_parallel(text, workers=4)
+    
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_bom_does_not_hide_the_first_message():
+    text = generate_chat(300, 'bracket')
+    expected = WhatsAppParser().parse(text)
+    data = b'\xef\xbb\xbf' + text.encode('utf-8')
+    
+    # One-byte chunks split the BOM itself across reads
+    for df in (
+        WhatsAppParser().parse(data.decode('utf-8')),
+        WhatsAppParser().parse_stream(chunked(data, 1)),
+        WhatsAppParser().parse_stream(data),
+        WhatsAppParser().parse_parallel(data, workers=3),
+    ):
+        pd.testing.assert_frame_equal(df, expected)
+
+
+def test_parallel_counts_lines_of_an_export_without_messages():
+    parser = WhatsAppParser()
+    
+    with pytest.raises(ValueError, match="No valid messages"):
+        parser.parse_parallel(b'not a chat\n' * 100, workers=3)
+    
+    assert parser.line_count == 100
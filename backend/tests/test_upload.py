@@ -0,0 +1,79 @@
+"""
+Upload Route Tests
+Slide selection in the response and the memory budget
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.routes.upload import MEMORY_BUDGET_DETAIL
+from benchmarks.synthetic import generate_chat
+
+client = TestClient(app)
+
+# Slide 1 is quick to compute, so the requests stay fast
+CHAT = generate_chat(2000).encode('utf-8')
+
+
+def upload(data: bytes = CHAT, slides: str = 'slide1'):
+    return client.post('/api/upload', params={'slides': slides}, files={'file': ('chat.txt', data, 'text/plain')})
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache(monkeypatch):
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_MB', 0)
+    monkeypatch.setattr('app.routes.upload.result_cache.max_bytes', 0)
+
+
+def test_slides_that_were_not_requested_are_omitted():
+    response = upload(slides='slide1,slide8')
+    
+    assert response.status_code == 200
+    data = response.json()['data']
+    assert set(data) == {'slide1', 'slide8'}
+    # Only approximate mode fills in the sample size
+    assert 'sample_size' not in data['slide8']
+
+
+def test_unknown_slide_is_rejected():
+    assert upload(slides='slide11').status_code == 400
+
+
+def test_chat_over_the_memory_budget_is_rejected(monkeypatch):
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_MB', 1)
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_POLICY', 'reject')
+    
+    response = upload()
+    
+    assert response.status_code == 413
+    assert response.json()['detail'] == MEMORY_BUDGET_DETAIL
+
+
+def test_chat_over_the_memory_budget_is_sampled(monkeypatch):
+    full = upload().json()['data']['slide1']['total_messages']
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_MB', 1)
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_POLICY', 'sample')
+    
+    response = upload()
+    
+    assert response.status_code == 200
+    assert 0 < response.json()['data']['slide1']['total_messages'] < full
+
+
+def test_chat_within_the_memory_budget_is_analyzed_in_full(monkeypatch):
+    full = upload().json()['data']['slide1']['total_messages']
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_MB', 100)
+    monkeypatch.setattr(settings, 'MEMORY_BUDGET_POLICY', 'reject')
+    
+    assert upload().json()['data']['slide1']['total_messages'] == full
+
+
+def test_export_without_messages_is_not_reported_as_empty(monkeypatch):
+    # Large enough to be split across processes
+    monkeypatch.setattr(settings, 'PARALLEL_PARSE_THRESHOLD_MB', 0)
+    
+    response = upload(b'not a chat\n' * 1000)
+    
+    assert response.status_code == 400
+    assert response.json()['detail'] == "No valid messages found in the chat export"